@@ -32,6 +32,7 @@ JSONS_PATH_PREFIX = (
     # "data/tours/test_routing_no_movement.json"  # str: the path to the drones tours,
 )
 # the {} should be used to specify the seed -> es. data/tours/RANDOM_missions1.json for seed 1.
+# binary tours (.npz, see utilities.json_to_npz) are loaded much faster than json ones.
 RANDOM_STEPS = [
     250,
     500,
@@ -50,6 +51,7 @@ DEBUG = False  # bool: whether to print debug strings or not.
 EXPERIMENTS_DIR = (
     "data/evaluation_tests/"  # output data : the results of the simulation
 )
+RUN_CACHE_DIR = "data/run_cache/"  # str: results of the runs, indexed by the hash of their configuration
 
 # drawing
 show_plot = False  # bool: whether to plot or not the simulation.
@@ -131,6 +133,41 @@ DEPOT_ADDRESS: NetAddr = 1
 CELL_PROB_SIZE_R = 1.875  # the percentage of cell size with respect to drone com range
 ENABLE_PROBABILITIES = False
 
+# --------------- packet table -------------- #
+ENABLE_PACKET_TABLE = (
+    False  # bool: store the data packets column-wise, see simulation.packet_table
+)
+
+# --------------- packet pool -------------- #
+ENABLE_PACKET_POOL = (
+    True  # bool: recycle the control packets, see simulation.packet_pool
+)
+
+# --------------- oracle neighbour discovery -------------- #
+# bool: the plain hello packets are still sent (and counted) but handed by the dispatcher
+# straight to the neighbour tables in range, see MediumDispatcher.deliver_hellos
+ORACLE_NEIGHBOURS = False
+
+# --------------- broadcast storm suppression -------------- #
+# the policy is broadcast_suppression, see routing_algorithms.flooding
+GOSSIP_PROBABILITY = 0.65  # float: probability to relay a flood, gossip policy
+COUNTER_THRESHOLD = (
+    3  # int: copies of a flood heard that cancel its relay, counter policy
+)
+# float: fraction of the communication range, a copy heard from closer cancels the relay
+DISTANCE_THRESHOLD = 0.5
+MAX_ASSESSMENT_DELAY = 3  # int: time steps, upper bound of the random assessment delay
+
+# --------------- q-learning routing -------------- #
+# the states are the cells of side drone_communication_range * CELL_PROB_SIZE_R
+QL_LEARNING_RATE = 0.2  # float [0,1]: weight of a feedback on the Q-value
+QL_EPSILON = 0.1  # float [0,1]: probability of exploring a random relay
+
+# --------------- gradient routing -------------- #
+BEACON_DELAY = 30  # int: time steps between two gradient beacons of the depot
+# int: time steps, a parent not refreshed by a beacon round for longer is dropped
+BEACON_TIMEOUT = 70
+
 
 DEPOT_NODE = NeighbourNode(
     DEPOT_ADDRESS,
@@ -146,7 +183,8 @@ vtime: int = 45
 duplicate_hold_time: int = 60
 
 
-from enums import ChannelError, RoutingAlgorithm
+from enums import BroadcastSuppression, ChannelError, RoutingAlgorithm
 
 routing_algorithm = RoutingAlgorithm.AODV
 communication_error_type = ChannelError.GAUSSIAN
+broadcast_suppression = BroadcastSuppression.NONE
@@ -4,6 +4,8 @@ from utilities.types import Point
 class Entity:
     """An entity in the environment, e.g. Drone, Event, Packet. It extends SimulatedEntity."""
 
+    __slots__ = ("identifier", "coords")
+
     identifier: int
     coords: Point
 
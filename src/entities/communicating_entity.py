@@ -3,7 +3,7 @@ from collections import defaultdict
 
 import config
 from entities.base import Entity
-from entities.packets import ACKPacket, DataPacket, Packet
+from entities.packets import ACKPacket, DataPacket, Packet, PacketBuffer
 from simulation.net import MediumDispatcher
 from utilities.types import NetAddr, Point
 
@@ -14,7 +14,7 @@ class CommunicatingEntity(Entity):
     sensing_range: int
     communication_range: int
     buffer_size: int
-    buffer: list[Packet]
+    buffer: PacketBuffer
     output_buffer: list[Packet]
     retransmission_buffer: set[Packet]
     time: int
@@ -37,7 +37,7 @@ class CommunicatingEntity(Entity):
         self.sensing_range = sensing_range
         self.communication_range = communication_range
         self.buffer_size = buffer_size
-        self.buffer: list[Packet] = []
+        self.buffer = PacketBuffer()
         self.output_buffer: list[Packet] = []
         self.retransmission_buffer: set[Packet] = set()
         self.time = 0
@@ -66,13 +66,9 @@ class CommunicatingEntity(Entity):
 
         routed_packets = []
         if self.router.has_neighbours():
-            for packet in self.all_packets():
-                if p := self.router.route_packet(packet):
-                    routed_packets.append(p)
-                elif isinstance(packet, DataPacket):
-                    # if we cannot route the data packet, let's try to do it next time
-                    # packet.timestamp += 1
-                    pass
+            self.forward_packets()
+            # packets that cannot be routed are tried again at their next retransmission
+            routed_packets = self.router.route_packets(self.all_packets())
         self.output_buffer.extend(routed_packets)
 
     def acknowledge_packet(self, packet: Packet):
@@ -91,21 +87,24 @@ class CommunicatingEntity(Entity):
         self.retransmission_buffer.clear()
         self.output_buffer.clear()
 
+    def forward_packets(self):
+        """forward the broadcast packets of the retransmission_buffer as they are"""
+        for packet in self.retransmission_buffer:
+            if packet.dst == config.BROADCAST_ADDRESS:
+                self.output_buffer.append(packet)
+
     def all_packets(self):
         """return packets, that should be routed at this moment.
         This includes:
         - packets from buffer, that were generated at this moment.
         - packets from buffer, that should be retransmitted
-        - all packets from retransmission_buffer"""
-        packets = []
-        for packet in self.retransmission_buffer:
-            if packet.dst == config.BROADCAST_ADDRESS:
-                self.output_buffer.append(packet)
-            else:
-                packets.append(packet)
-        for packet in self.buffer:
-            if (self.time - packet.timestamp) % config.retransmission_delay == 0:
-                packets.append(packet)
+        - unicast packets from retransmission_buffer"""
+        packets = [
+            packet
+            for packet in self.retransmission_buffer
+            if packet.dst != config.BROADCAST_ADDRESS
+        ]
+        packets.extend(self.buffer.due(self.time))
 
         return packets
 
@@ -131,19 +130,12 @@ class CommunicatingEntity(Entity):
 
     def remove_packets(self, packet_ids: list[int]):
         """Removes the packets from the buffer."""
-        if not packet_ids:
-            return
-        to_remove = []
-        for packet in self.buffer:
-            if packet.identifier in packet_ids:
-                to_remove.append(packet)
-                if config.DEBUG:
-                    print(
-                        "ROUTING del: drone: "
-                        + str(self.identifier)
-                        + " - removed a packet id: "
-                        + str(packet.identifier)
-                    )
-        for packet in to_remove:
-            # print("Dropping packet", packet)
-            self.buffer.remove(packet)
+        for packet_id in packet_ids:
+            packet = self.buffer.pop(packet_id)
+            if packet is not None and config.DEBUG:
+                print(
+                    "ROUTING del: drone: "
+                    + str(self.identifier)
+                    + " - removed a packet id: "
+                    + str(packet.identifier)
+                )
@@ -7,6 +7,7 @@ from entities.packets.aodv import RRepPacket
 from entities.packets.olsr import OLSRDataPacket
 from simulation.metrics import Metrics
 from simulation.net import MediumDispatcher
+from simulation.packet_table import PacketTable
 from utilities.types import NetAddr, Point
 
 logger = logging.getLogger(__name__)
@@ -16,6 +17,8 @@ class Depot(CommunicatingEntity):
     """The depot is an Entity."""
 
     depot_buffer: set[Packet]
+    # (id event, delay, outcome) of the step, see BaseRouting.feedback
+    outcomes: list[tuple[int, int, int]]
 
     def __init__(
         self, address: NetAddr, coords: Point, network: MediumDispatcher, simulator
@@ -33,6 +36,7 @@ class Depot(CommunicatingEntity):
 
         self.simulator = simulator
         self.depot_buffer = set()
+        self.outcomes = []
 
     def consume_packet(self, packet: Packet):
         # if isinstance(packet, RRepPacket):
@@ -42,6 +46,9 @@ class Depot(CommunicatingEntity):
             # print("GOT PACKET ", packet)
             self.acknowledge_packet(packet)
             Metrics.instance().drones_packets_to_depot.append((packet, self.time))
+            event = packet.event_ref
+            self.outcomes.append((event.identifier, self.time - event.current_time, 1))
+            PacketTable.instance().delivered(packet.table_index)
             if packet not in self.depot_buffer:
                 self.depot_buffer.add(packet)
                 if config.DEBUG:
@@ -58,34 +65,19 @@ class Depot(CommunicatingEntity):
     def send_packets(self):
         super().send_packets(True)
 
-    # def routing(self):
-    #     """do the routing"""
-    #     packets = self.router.routing_control(self.time)
-    #     self.output_buffer.extend(packets)
+    def routing(self):
+        super().routing()
+        self.give_feedback()
 
-    # def transfer_notified_packets(self, current_drone, cur_step):
-    #     """function called when a drone wants to offload packets to the depot"""
-    #
-    #     packets_to_offload = current_drone.all_packets()
-    #     self.buffer += packets_to_offload
-    #
-    #     for pck in packets_to_offload:
-    #
-    #         if config.routing_algorithm.name not in "GEO" "RND" "GEOS":
-    #
-    #             feedback = 1
-    #             delivery_delay = cur_step - pck.event_ref.current_time
-    #
-    #             for drone in self.simulator.drones:
-    #                 drone.routing_algorithm.feedback(
-    #                     current_drone,
-    #                     pck.event_ref.identifier,
-    #                     delivery_delay,
-    #                     feedback,
-    #                 )
-    #         # print(f"DEPOT -> Drone {current_drone.identifier} packet: {pck.event_ref} total packets in sim: {len(Metrics.instance().drones_packets_to_depot)}")
-    #
-    #         # add metrics: all the packets notified to the depot
-    #         Metrics.instance().drones_packets_to_depot.add((pck, cur_step))
-    #         Metrics.instance().drones_packets_to_depot_list.append((pck, cur_step))
-    #         pck.time_delivery = cur_step
+    def notify_expired(self, packet: DataPacket):
+        """a drone let a data packet expire"""
+        event = packet.event_ref
+        self.outcomes.append((event.identifier, self.time - event.current_time, -1))
+
+    def give_feedback(self):
+        """report the events delivered and expired in this step to the drones"""
+        if not self.outcomes:
+            return
+        for drone in self.simulator.drones:
+            drone.router.feedback(self.outcomes)
+        self.outcomes = []
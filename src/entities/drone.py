@@ -9,6 +9,7 @@ from entities.packets import Packet
 from entities.packets.base import ACKPacket, DataPacket
 from simulation.metrics import Metrics
 from simulation.net import MediumDispatcher
+from simulation.packet_table import PacketTable
 from utilities import utilities
 from utilities.types import NetAddr, Path, Point
 
@@ -50,14 +51,18 @@ class Drone(CommunicatingEntity):
         """
         Removes the expired packets from the buffer
         """
-        to_drop = []
-        for pck in self.buffer:
-            if not pck.is_expired(self.time):
-                continue
-
-            to_drop.append(pck.identifier)
+        expired = self.buffer.expired(self.time)
+        if not expired:
+            return
+        # only the data packets count as expired traffic, the ACKs are just dropped
+        expired_data = [pck for pck in expired if isinstance(pck, DataPacket)]
+        if expired_data:
+            Metrics.instance().expired_packets_per_step[self.time] += len(expired_data)
+        for pck in expired_data:
+            PacketTable.instance().expired(pck.table_index)
+            self.depot.notify_expired(pck)
 
-        self.remove_packets(to_drop)
+        self.remove_packets([pck.identifier for pck in expired])
 
     def feel_event(self, cur_step: int):
         """
@@ -77,18 +82,14 @@ class Drone(CommunicatingEntity):
         self.output_buffer.extend(packets)
 
         routed_packets = []
+        packets_to_route = []
         if self.router.has_neighbours():
-            for packet in self.all_packets():
-                if p := self.router.route_packet(packet):
-                    routed_packets.append(p)
-                elif isinstance(packet, DataPacket):
-                    # if we cannot route the data packet, let's try to do it next time
-                    # packet.timestamp += 1
-                    pass
-        if self.address == 3 and any(
-            map(lambda x: isinstance(x, ACKPacket), self.all_packets())
-        ):
-            if config.DEBUG:
+            self.forward_packets()
+            packets_to_route = self.all_packets()
+            # packets that cannot be routed are tried again at their next retransmission
+            routed_packets = self.router.route_packets(packets_to_route)
+        if config.DEBUG and self.address == 3:
+            if any(map(lambda x: isinstance(x, ACKPacket), packets_to_route)):
                 print("DRONE 3", routed_packets)
         self.output_buffer.extend(routed_packets)
 
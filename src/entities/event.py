@@ -1,6 +1,7 @@
 import config
 from entities.base import Entity
 from simulation.metrics import Metrics
+from simulation.packet_table import PacketTable
 from utilities.types import Point
 
 
@@ -8,8 +9,10 @@ from utilities.types import Point
 class Event(Entity):
     """An event is any kind of event that the drone detects on the aoi. It is an Entity."""
 
+    __slots__ = ("current_time", "deadline")
+
     def __init__(self, coords: Point, current_time: int, deadline: int | None = None):
-        super().__init__(id(self), coords)
+        super().__init__(PacketTable.instance().next_id(), coords)
         self.current_time = current_time
 
         # One can specify the deadline or just consider as deadline now + EVENTS_DURATION
@@ -33,9 +36,24 @@ class Event(Entity):
             "id": self.identifier,
         }
 
+    def __deepcopy__(self, memo):
+        # events do not change once created, copies of a packet share its event
+        return self
+
+    def __reduce_ex__(self, protocol):
+        # the sentinel stays a singleton when pickled
+        if self is NO_EVENT:
+            return "NO_EVENT"
+        return super().__reduce_ex__(protocol)
+
     def is_expired(self, cur_step: int):
         """return true if the deadline expired"""
         return cur_step > self.deadline
 
     def __repr__(self):
         return "Ev id:" + str(self.identifier) + " c:" + str(self.coords)
+
+
+# shared by all the packets that are not associated to an event (e.g. control packets)
+NO_EVENT = Event((-1, -1), -1, deadline=-1)
+NO_EVENT.identifier = -1  # never clashes with the allocated identifiers
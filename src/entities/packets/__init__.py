@@ -1 +1,2 @@
 from entities.packets.base import ACKPacket, DataPacket, HelloPacket, Packet
+from entities.packets.buffer import PacketBuffer
@@ -1,14 +1,19 @@
+from typing import Hashable
+
 from entities.event import Event
 from entities.packets import Packet
 from utilities.types import NetAddr
 
 
 class AODVPacket:
+    __slots__ = ()
+
     TYPE: int
 
 
 class RReqPacket(Packet, AODVPacket):
     TYPE = 1
+    __slots__ = ("rreq_id", "dst_addr", "org_seq", "dst_seq")
     rreq_id: int
     hop_count: int
     dst_addr: NetAddr
@@ -39,6 +44,7 @@ class RReqPacket(Packet, AODVPacket):
 
 class RRepPacket(Packet, AODVPacket):
     TYPE = 2
+    __slots__ = ("lifetime", "dst_addr", "dst_seq", "org_addr")
     hop_count: int
     lifetime: int
     dst_addr: NetAddr
@@ -67,6 +73,7 @@ class RRepPacket(Packet, AODVPacket):
 
 class RErrPacket(Packet, AODVPacket):
     TYPE = 3
+    __slots__ = ("destinations",)
     destinations: list[tuple[NetAddr, int]]
 
     def __init__(
@@ -79,6 +86,12 @@ class RErrPacket(Packet, AODVPacket):
         super().__init__(source, destination, timestamp, None)
         self.destinations = destinations
 
+    @property
+    def flood_key(self) -> Hashable:
+        # every router relays a RERR of its own, the copies of a report share its content
+        return frozenset(self.destinations)
+
 
 class RRepAckPacket(Packet, AODVPacket):
     TYPE = 4
+    __slots__ = ()
@@ -1,13 +1,29 @@
+from typing import Hashable
+
 import config
 from entities.base import Entity
-from entities.event import Event
+from entities.event import NO_EVENT, Event
 from simulation.metrics import Metrics
+from simulation.packet_table import PacketTable
 from utilities.types import NetAddr, Point
 
 
 class Packet(Entity):
     """A packet is an object created out of an event monitored on the aoi."""
 
+    __slots__ = (
+        "src",
+        "dst",
+        "src_relay",
+        "dst_relay",
+        "timestamp",
+        "ttl",
+        "hop_count",
+        "event_ref",
+        "pooled",
+        "rx_distance",
+    )
+
     src: NetAddr
     dst: NetAddr
     src_relay: NetAddr
@@ -15,7 +31,8 @@ class Packet(Entity):
     timestamp: int
     ttl: int
     hop_count: int
-    event_ref: Event | None = None
+    event_ref: Event
+    rx_distance: float  # from the last transmitter, set by the medium at reception
 
     def __init__(
         self,
@@ -28,12 +45,12 @@ class Packet(Entity):
         as for now, every packet is an event."""
 
         event_ref_crafted = (
-            event_ref if event_ref is not None else Event((-1, -1), timestamp)
-        )  # default event if packet is not associated to the event
+            event_ref if event_ref is not None else NO_EVENT
+        )  # shared sentinel if packet is not associated to the event
 
-        # id(self) is the id of this instance (unique for every new created packet),
+        # the identifier is unique for every new created packet (copies share it),
         # the coordinates are those of the event
-        super().__init__(id(self), event_ref_crafted.coords)
+        super().__init__(PacketTable.instance().next_id(), event_ref_crafted.coords)
 
         self.src = source
         self.src_relay = source
@@ -43,9 +60,23 @@ class Packet(Entity):
         self.event_ref = event_ref_crafted
         self.ttl = config.packets_max_ttl
         self.hop_count = 0
+        self.pooled = False  # True if the packet goes back to the PacketPool once sent
+        self.rx_distance = 0
 
         if event_ref is not None:
-            self.add = Metrics.instance().drones_packets.add(self)
+            Metrics.instance().drones_packets.add(self)
+
+    @property
+    def flood_key(self) -> Hashable:
+        """what the copies of a broadcast have in common, for the broadcast storm suppression"""
+        return self.identifier
+
+    @property
+    def deadline(self) -> int:
+        """the deadline of the event, packets without event last event_duration steps"""
+        if self.event_ref is NO_EVENT:
+            return self.timestamp + config.event_duration
+        return self.event_ref.deadline
 
     def age_of_packet(self, cur_step: int):
         return cur_step - self.timestamp
@@ -56,7 +87,7 @@ class Packet(Entity):
         return {
             "coord": self.coords,
             "i_gen": self.timestamp,
-            "i_dead": self.event_ref.deadline,
+            "i_dead": self.deadline,
             "id": self.identifier,
             "TTL": self.ttl,
             "id_event": self.event_ref.identifier,
@@ -64,7 +95,7 @@ class Packet(Entity):
 
     def is_expired(self, cur_step):
         """a packet expires if the deadline of the event expires, or the maximum TTL is reached"""
-        return cur_step > self.event_ref.deadline
+        return cur_step > self.deadline
 
     def __repr__(self):
         packet_type = str(self.__class__).split(".")[-1].split("'")[0]
@@ -74,7 +105,10 @@ class Packet(Entity):
 class DataPacket(Packet):
     """Basically a Packet"""
 
+    __slots__ = ("table_index",)
+
     event_ref: Event
+    table_index: int  # row in the PacketTable, -1 if the table is disabled
 
     def __init__(
         self,
@@ -84,9 +118,11 @@ class DataPacket(Packet):
         event_ref: Event,
     ):
         super().__init__(source, destination, timestamp, event_ref)
+        self.table_index = PacketTable.instance().add(self)
 
 
 class ACKPacket(Packet):
+    __slots__ = ("acked_packet_id",)
 
     acked_packet_id: int
 
@@ -107,6 +143,8 @@ class ACKPacket(Packet):
 class HelloPacket(Packet):
     """The hello message is responsible to give info about neighborhood"""
 
+    __slots__ = ("cur_pos", "speed", "next_target")
+
     cur_pos: Point
     speed: int
     next_target: Point
@@ -0,0 +1,85 @@
+import heapq
+import itertools
+from typing import Iterable, Iterator
+
+import config
+from entities.packets.base import Packet
+
+
+class PacketBuffer:
+    """Insertion-ordered packet buffer indexed by packet identifier.
+    Iteration follows the insertion order, removal by identifier is O(1).
+    A min-heap ordered by event deadline finds the expired packets without scanning the
+    buffer: packets removed in the meantime (e.g. acknowledged) are skipped lazily.
+    A hashed timing wheel with retransmission_delay slots holds the packets by
+    timestamp % retransmission_delay, so the packets to (re)transmit at a given step
+    are found without scanning the buffer."""
+
+    def __init__(
+        self, packets: Iterable[Packet] = (), retransmission_delay: int | None = None
+    ):
+        if retransmission_delay is None:
+            retransmission_delay = config.retransmission_delay
+        self.packets: dict[int, Packet] = {}
+        self.deadlines: list[tuple[int, int, Packet]] = []
+        self.counter = itertools.count()
+        self.wheel: list[dict[int, Packet]] = [{} for _ in range(retransmission_delay)]
+        for packet in packets:
+            self.append(packet)
+
+    def slot(self, packet: Packet) -> dict[int, Packet]:
+        return self.wheel[packet.timestamp % len(self.wheel)]
+
+    def append(self, packet: Packet):
+        old = self.packets.get(packet.identifier)
+        if old is not None:
+            del self.slot(old)[old.identifier]
+        self.packets[packet.identifier] = packet
+        self.slot(packet)[packet.identifier] = packet
+        heapq.heappush(
+            self.deadlines,
+            (packet.deadline, next(self.counter), packet),
+        )
+
+    def remove(self, packet: Packet):
+        if self.pop(packet.identifier) is None:
+            raise KeyError(packet.identifier)
+
+    def pop(self, identifier: int) -> Packet | None:
+        """remove the packet with the given identifier, return it or None if not in the buffer"""
+        packet = self.packets.pop(identifier, None)
+        if packet is not None:
+            del self.slot(packet)[identifier]
+        return packet
+
+    def due(self, cur_step: int) -> list[Packet]:
+        """return the packets to (re)transmit at cur_step, i.e. those generated
+        a multiple of retransmission_delay steps ago"""
+        return list(self.wheel[cur_step % len(self.wheel)].values())
+
+    def expired(self, cur_step: int) -> list[Packet]:
+        """return the buffered packets expired at cur_step (see Packet.is_expired)"""
+        expired = []
+        while self.deadlines and self.deadlines[0][0] < cur_step:
+            _, _, packet = heapq.heappop(self.deadlines)
+            if self.packets.get(packet.identifier) is packet:
+                expired.append(packet)
+        return expired
+
+    def clear(self):
+        self.packets.clear()
+        self.deadlines.clear()
+        for slot in self.wheel:
+            slot.clear()
+
+    def __contains__(self, packet: Packet) -> bool:
+        return packet.identifier in self.packets
+
+    def __iter__(self) -> Iterator[Packet]:
+        return iter(self.packets.values())
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    def __repr__(self):
+        return f"PacketBuffer({list(self.packets.values())})"
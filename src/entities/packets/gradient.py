@@ -0,0 +1,22 @@
+from entities.packets.base import Packet
+from utilities.types import NetAddr
+
+
+class BeaconPacket(Packet):
+    """
+    Gradient beacon: flooded by the depot once per round, hop_count is the distance in hops
+    of its last transmitter from the depot and timestamp the start of the round.
+    """
+
+    __slots__ = ("round",)
+    round: int
+
+    def __init__(
+        self,
+        source: NetAddr,
+        destination: NetAddr,
+        timestamp: int,
+        round: int,
+    ):
+        super().__init__(source, destination, timestamp, None)
+        self.round = round
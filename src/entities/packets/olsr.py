@@ -15,8 +15,16 @@ class LinkCode:
     link_type: LinkType
     neighbour_type: NeighbourType
 
+    def __deepcopy__(self, memo):
+        # link codes are frozen, the copies of a hello share them
+        return self
+
 
 class OLSRPacket:
+    # empty: concrete packets declare sequence_number and message_type in their own
+    # slots, a second base class with non-empty slots would break the layout
+    __slots__ = ()
+
     message_type: Literal["hello", "tc", "other"]
     sequence_number: int
 
@@ -29,9 +37,10 @@ class OLSRPacket:
 
 
 class OLSRHelloPacket(HelloPacket, OLSRPacket):
+    __slots__ = ("sequence_number", "message_type", "willingness", "htime", "links")
     willingness: int
     htime: int
-    links: dict[LinkCode, list[NetAddr]]
+    links: dict[NetAddr, LinkCode]  # neighbour address -> its link code
 
     def __init__(
         self,
@@ -52,6 +61,7 @@ class OLSRHelloPacket(HelloPacket, OLSRPacket):
 
 
 class OLSRTopologyControlPacket(Packet, OLSRPacket):
+    __slots__ = ("sequence_number", "message_type", "ansn", "advertised_neigbours")
     ansn: int
     advertised_neigbours: list[NetAddr]
 
@@ -74,6 +84,8 @@ class OLSRTopologyControlPacket(Packet, OLSRPacket):
 
 
 class OLSRDataPacket(DataPacket, OLSRPacket):
+    __slots__ = ("sequence_number", "message_type")
+
     def __init__(
         self,
         source: NetAddr,
@@ -87,6 +99,8 @@ class OLSRDataPacket(DataPacket, OLSRPacket):
 
 
 class OLSRACKPacket(ACKPacket, OLSRPacket):
+    __slots__ = ("sequence_number", "message_type")
+
     def __init__(
         self,
         source: NetAddr,
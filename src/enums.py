@@ -1,7 +1,14 @@
 from enum import Enum
 
 from routing_algorithms.aodv import AODVRouting
+from routing_algorithms.flooding import (
+    CounterSuppression,
+    DistanceSuppression,
+    Flooding,
+    GossipSuppression,
+)
 from routing_algorithms.georouting import GeoRouting
+from routing_algorithms.gradient import GradientRouting
 from routing_algorithms.olsr import OLSRRouting
 from routing_algorithms.q_learning_routing import QLearningRouting
 from routing_algorithms.random_routing import RandomRouting
@@ -13,6 +20,7 @@ class RoutingAlgorithm(Enum):
     QL = QLearningRouting
     OLSR = OLSRRouting
     AODV = AODVRouting
+    GRAD = GradientRouting
 
     @staticmethod
     def keylist():
@@ -27,3 +35,14 @@ class ChannelError(Enum):
     @staticmethod
     def keylist():
         return list(map(lambda c: c.name, ChannelError))
+
+
+class BroadcastSuppression(Enum):
+    NONE = Flooding
+    GOSSIP = GossipSuppression
+    COUNTER = CounterSuppression
+    DISTANCE = DistanceSuppression
+
+    @staticmethod
+    def keylist():
+        return list(map(lambda c: c.name, BroadcastSuppression))
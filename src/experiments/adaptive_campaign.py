@@ -0,0 +1,118 @@
+"""Adaptive seed allocation for sweep campaigns.
+
+After an initial batch of seeds, new seeds are added only to the (algorithm, n_drones) cells
+whose confidence interval on the tracked metrics is still wider than the target, until the
+run budget is used up. Runs go through the run cache, so an interrupted campaign resumes
+deterministically from where it stopped.
+"""
+
+import itertools
+import logging
+import math
+
+import numpy as np
+from scipy.stats import t as student_t
+
+import config
+from utilities import run_cache
+
+logger = logging.getLogger(__name__)
+
+# metric of Metrics.dict_rep -> target confidence-interval half-width
+DEFAULT_TARGETS = {
+    "pdr": 0.02,
+    "mean_delivery_time": 5.0,  # seconds
+}
+
+
+def half_width(values: list[float], confidence: float = 0.95) -> float:
+    """half-width of the student-t confidence interval of the mean, inf with less than 2 samples"""
+    values = [v for v in values if v is not None and not math.isnan(v)]
+    if len(values) < 2:
+        return math.inf
+    n = len(values)
+    return student_t.ppf((1 + confidence) / 2, n - 1) * np.std(values, ddof=1) / n**0.5
+
+
+def cell_precision(
+    results: list[dict], targets: dict[str, float], confidence: float = 0.95
+) -> float:
+    """the worst ratio half-width / target among the metrics, the cell is done when <= 1"""
+    return max(
+        half_width([r[metric] for r in results], confidence) / target
+        for metric, target in targets.items()
+    )
+
+
+def adaptive_campaign(
+    algorithms: list,
+    n_drones: list[int],
+    initial_seeds: list[int],
+    budget: int,
+    targets: dict[str, float] | None = None,
+    confidence: float = 0.95,
+    force: bool = False,
+    **simulator_kwargs,
+) -> dict[tuple[str, int], list[dict]]:
+    """
+    Run a campaign with adaptive seed allocation.
+    @param algorithms: the routing algorithms (RoutingAlgorithm members)
+    @param n_drones: the numbers of drones
+    @param initial_seeds: the seeds every cell is run with
+    @param budget: the maximum number of runs of the whole campaign (initial batch included)
+    @param targets: metric -> confidence-interval half-width to reach, DEFAULT_TARGETS if None
+    @param confidence: the confidence level of the intervals
+    @param force: run the simulations even if their results are in the run cache
+    @param simulator_kwargs: other parameters of the Simulator, shared by all the runs
+    @return: (algorithm name, n_drones) -> results of the runs of the cell
+    """
+    targets = DEFAULT_TARGETS if targets is None else targets
+    cache = run_cache.RunCache(force=force)
+    cells = list(itertools.product(algorithms, n_drones))
+    results: dict[tuple[str, int], list[dict]] = {
+        (alg.name, nd): [] for alg, nd in cells
+    }
+    # every cell draws its extra seeds from the same sequence, so cells stay comparable
+    extra_seeds = {cell: itertools.count(max(initial_seeds) + 1) for cell in results}
+    runs = 0
+
+    def run(algorithm, drones, seed):
+        nonlocal runs
+        config.routing_algorithm = algorithm
+        results[(algorithm.name, drones)].append(
+            run_cache.cached_run(
+                cache,
+                seed=seed,
+                n_drones=drones,
+                routing_algorithm=algorithm,
+                **simulator_kwargs,
+            )
+        )
+        runs += 1
+
+    for (algorithm, drones), seed in itertools.product(cells, initial_seeds):
+        if runs >= budget:
+            logger.warning("Run budget exhausted during the initial batch")
+            return results
+        run(algorithm, drones, seed)
+
+    while runs < budget:
+        precision = {
+            (alg, nd): cell_precision(results[(alg.name, nd)], targets, confidence)
+            for alg, nd in cells
+        }
+        open_cells = [cell for cell in cells if precision[cell] > 1]
+        if not open_cells:
+            break
+        # the noisiest cells get their seed first, in case the budget ends mid-round
+        open_cells.sort(key=lambda cell: precision[cell], reverse=True)
+        for algorithm, drones in open_cells[: budget - runs]:
+            seed = next(extra_seeds[(algorithm.name, drones)])
+            logger.info(
+                f"Adding seed {seed} to {algorithm.name} {drones} drones "
+                f"(precision {precision[(algorithm, drones)]:.2f})"
+            )
+            run(algorithm, drones, seed)
+
+    logger.info(f"Adaptive campaign completed with {runs} runs")
+    return results
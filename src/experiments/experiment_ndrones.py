@@ -3,27 +3,26 @@ import os
 import config
 from experiments.parser.parser import command_line_parser
 from simulation.simulator import Simulator
+from utilities import run_cache
 from utilities.experiments_config import *
 
 
-def sim_setup(n_drones, seed, algorithm):
+def sim_params(n_drones, seed, algorithm):
     """
-    Build an instance of Simulator using the parameters from utilities.experiments_config.py
+    Build the Simulator parameters from utilities.experiments_config.py
     @param n_drones: the number of drones during the simulation
     @param seed: the simulation seed
     @param algorithm: the algorithm used to route the packets
-    @return: an instance of Simulator
+    @return: the keyword arguments of the Simulator
     """
 
-    return Simulator(
+    return dict(
         len_simulation=len_simulation,
         time_step_duration=time_step_duration,
         seed=seed,
         n_drones=n_drones,
         env_width=env_width,
         env_height=env_height,
-        drone_com_range=drone_com_range,
-        drone_sen_range=drone_sen_range,
         drone_speed=drone_speed,
         drone_max_buffer_size=drone_max_buffer_size,
         drone_max_energy=drone_max_energy,
@@ -42,7 +41,19 @@ def sim_setup(n_drones, seed, algorithm):
     )
 
 
-def launch_experiments(n_drones, in_seed, out_seed, algorithm):
+def sim_setup(n_drones, seed, algorithm):
+    """
+    Build an instance of Simulator using the parameters from utilities.experiments_config.py
+    @param n_drones: the number of drones during the simulation
+    @param seed: the simulation seed
+    @param algorithm: the algorithm used to route the packets
+    @return: an instance of Simulator
+    """
+
+    return Simulator(**sim_params(n_drones, seed, algorithm))
+
+
+def launch_experiments(n_drones, in_seed, out_seed, algorithm, force=False):
     """
     The function launches simulations for a given algorithm and drones number
     with seeds ranging from in_seed up to out_seed
@@ -50,11 +61,20 @@ def launch_experiments(n_drones, in_seed, out_seed, algorithm):
     @param in_seed: integer that describe the initial seed
     @param out_seed: integer that describe the final seed
     @param algorithm: the routing algorithm
+    @param force: run the simulations even if their results are in the run cache
     @return:
     """
 
+    config.routing_algorithm = config.RoutingAlgorithm[algorithm]
+    cache = run_cache.RunCache(force=force)
+
     for seed in range(in_seed, out_seed):
 
+        key = run_cache.run_key(**sim_params(n_drones, seed, algorithm))
+        if key in cache:
+            print(f"Skipping {algorithm} with {n_drones} drones seed {seed} (cached)")
+            continue
+
         print(f"Running {algorithm} with {n_drones} drones seed {seed}")
 
         simulation = sim_setup(n_drones, seed, algorithm)
@@ -63,6 +83,8 @@ def launch_experiments(n_drones, in_seed, out_seed, algorithm):
 
         simulation.close()
 
+        cache.store(key, simulation.metrics.dict_rep())
+
 
 if __name__ == "__main__":
 
@@ -72,11 +94,14 @@ if __name__ == "__main__":
     initial_seed = args.initial_seed
     end_seed = args.end_seed
     algorithm_routing = args.algorithm_routing
+    force = args.force
     path_filename = config.EXPERIMENTS_DIR
 
     # build directories for results and models
     os.system("mkdir " + path_filename)
 
-    launch_experiments(number_of_drones, initial_seed, end_seed, algorithm_routing)
+    launch_experiments(
+        number_of_drones, initial_seed, end_seed, algorithm_routing, force
+    )
 
     print("Simulations completed!")
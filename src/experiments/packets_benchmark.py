@@ -0,0 +1,75 @@
+"""Memory and allocation benchmark of the packet classes.
+
+For every packet type it measures the memory held by one packet (tracemalloc, event
+included when the packet creates its own) and how many packets per second can be created.
+
+Run with: PYTHONPATH=src python -m experiments.packets_benchmark
+"""
+
+import time
+import tracemalloc
+
+import config
+from entities.event import Event
+from entities.packets import ACKPacket, DataPacket, HelloPacket
+from entities.packets.aodv import RReqPacket, RRepPacket
+from entities.packets.olsr import (
+    OLSRDataPacket,
+    OLSRHelloPacket,
+    OLSRTopologyControlPacket,
+)
+from simulation.metrics import Metrics
+
+N_PACKETS = 100_000
+
+EVENT = Event((10, 10), 0)
+
+FACTORIES = {
+    "DataPacket": lambda: DataPacket(2, config.DEPOT_ADDRESS, 0, EVENT),
+    "ACKPacket": lambda: ACKPacket(config.DEPOT_ADDRESS, 2, 0, 0),
+    "HelloPacket": lambda: HelloPacket(
+        2, config.BROADCAST_ADDRESS, 0, (10, 10), 8, (20, 20)
+    ),
+    "RReqPacket": lambda: RReqPacket(2, config.BROADCAST_ADDRESS, 0, 0, 0, 1, 0),
+    "RRepPacket": lambda: RRepPacket(2, 3, 0, 0, 60, 1, 0, 3),
+    "OLSRHelloPacket": lambda: OLSRHelloPacket(
+        2, config.BROADCAST_ADDRESS, 0, (10, 10), 8, (20, 20), 0
+    ),
+    "OLSRTopologyControlPacket": lambda: OLSRTopologyControlPacket(
+        2, config.BROADCAST_ADDRESS, 0, 0, 0, [3, 4]
+    ),
+    "OLSRDataPacket": lambda: OLSRDataPacket(2, config.DEPOT_ADDRESS, 0, 0, EVENT),
+}
+
+
+def footprint(factory) -> float:
+    """bytes held per packet"""
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    packets = [factory() for _ in range(N_PACKETS)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the list itself holds one pointer per packet
+    return (end - start) / len(packets) - 8
+
+
+def creation_rate(factory) -> float:
+    """packets created per second"""
+    start = time.perf_counter()
+    for _ in range(N_PACKETS):
+        factory()
+    return N_PACKETS / (time.perf_counter() - start)
+
+
+def run():
+    print(f"{'packet':<28}{'bytes/packet':>14}{'packets/s':>14}")
+    for name, factory in FACTORIES.items():
+        size = footprint(factory)
+        rate = creation_rate(factory)
+        # data packets are tracked by the metrics, do not let them pile up
+        Metrics._instance = None
+        print(f"{name:<28}{size:>14.0f}{rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    run()
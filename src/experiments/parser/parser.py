@@ -36,3 +36,9 @@ command_line_parser.add_argument(
     choices=routing_choices,
     help="the routing algorithm to use",
 )
+command_line_parser.add_argument(
+    "-f",
+    dest="force",
+    action="store_true",
+    help="run the simulations even if their results are already in the run cache",
+)
@@ -4,12 +4,15 @@ import logging
 import tqdm
 
 from simulation.simulator import Simulator
+from utilities import run_cache
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
-def run_experiments():
+def run_experiments(force: bool = False):
+    """run the whole campaign, skipping the runs whose results are already in the run cache.
+    force : run (and store again) every simulation, even the cached ones"""
     import config
     from enums import RoutingAlgorithm
 
@@ -22,15 +25,31 @@ def run_experiments():
     # algorithms = [RoutingAlgorithm.GEO]
     n_drones = [5, 10, 15, 20, 30, 40]
     seeds = [12, 23, 34, 45, 56]
+    cache = run_cache.RunCache(force=force)
 
     for algorithm, drones, seed in tqdm.tqdm(
         itertools.product(algorithms, n_drones, seeds)
     ):
         config.routing_algorithm = algorithm
-        sim = Simulator(seed=seed, n_drones=drones, routing_algorithm=algorithm)
-        logger.info("Running the simulation")
-        sim.run()  # run the simulation
-        sim.close()
+        run_cache.cached_run(
+            cache, seed=seed, n_drones=drones, routing_algorithm=algorithm
+        )
+
+
+def run_adaptive_experiments(budget: int = 150, force: bool = False):
+    """run the campaign adding seeds only to the cells whose confidence intervals are still too wide.
+    budget : the maximum number of runs of the campaign
+    force : run (and store again) every simulation, even the cached ones"""
+    from enums import RoutingAlgorithm
+    from experiments.adaptive_campaign import adaptive_campaign
+
+    algorithms = [
+        RoutingAlgorithm.AODV,
+    ]
+    n_drones = [5, 10, 15, 20, 30, 40]
+    initial_seeds = [12, 23, 34]
+
+    adaptive_campaign(algorithms, n_drones, initial_seeds, budget, force=force)
 
 
 def main():
@@ -1,13 +1,18 @@
+import collections
+import heapq
 import itertools
 import logging
+import math
 import sys
 from dataclasses import dataclass, field
+from typing import Hashable
 
 import config
 from entities.communicating_entity import CommunicatingEntity
 from entities.packets import aodv
 from entities.packets.base import HelloPacket, Packet
 from routing_algorithms.base import BaseRouting
+from simulation.metrics import Metrics
 from utilities.types import NetAddr
 
 logger = logging.getLogger(__name__)
@@ -16,18 +21,33 @@ logger = logging.getLogger(__name__)
 ACTIVE_ROUTE_TIMEOUT = config.OLD_HELLO_PACKET
 ALLOWED_HELLO_LOSS = 2
 DELETE_PERIOD = ALLOWED_HELLO_LOSS * config.HELLO_DELAY
+LOCAL_ADD_TTL = 2
 MY_ROUTE_TIMEOUT = 2 * ACTIVE_ROUTE_TIMEOUT
-NET_DIAMETER = config.n_drones // 3
+# hops across the diagonal of the area (the number of drones is not known at import time)
+NET_DIAMETER = math.ceil(
+    math.hypot(config.env_width, config.env_height) / config.drone_communication_range
+)
+MAX_REPAIR_TTL = math.ceil(0.3 * NET_DIAMETER)
+# how long a broken active route waits for a packet to start its local repair
+REPAIR_WAIT = DELETE_PERIOD
 NODE_TRAVERSAL_TIME = 1
 NET_TRAVERSAL_TIME = 2 * NODE_TRAVERSAL_TIME * NET_DIAMETER
 PATH_DISCOVERY_TIME = 2 * NET_TRAVERSAL_TIME
-RING_TRAVERSAL_TIME = 2 * NODE_TRAVERSAL_TIME * 1
 RREQ_RETRIES = 2
+TIMEOUT_BUFFER = 2
 TTL_INCREMENT = 2
 TTL_START = 1
 TTL_THRESHOLD = 7
 
 
+def ring_traversal_time(ttl: int, relay_delay: int = 0) -> int:
+    """
+    how long to wait for the RREP of a RREQ sent with the given ttl, relay_delay being how
+    long each hop may hold the RREQ before relaying it
+    """
+    return (2 * NODE_TRAVERSAL_TIME + relay_delay) * (ttl + TIMEOUT_BUFFER)
+
+
 @dataclass
 class RoutingTableEntry:
     dest: NetAddr
@@ -40,28 +60,115 @@ class RoutingTableEntry:
     precursors: set[NetAddr] = field(default_factory=set)
     is_repairable: bool = False
     is_being_repaired: bool = False
+    last_used: int = -1  # when the route last relayed a packet of another source
+    # deadline of the entry of the route in the expiry heap, None if not queued
+    queued_expiry: int | None = field(default=None, repr=False, compare=False)
+
+
+class RoutingTable(dict[NetAddr, RoutingTableEntry]):
+    """
+    The AODV routing table, destination -> route, with two indexes kept in sync:
+    - next hop -> destinations routed through it, so that the routes broken by a lost next
+      hop are found without scanning the table;
+    - a heap of (expiry time, destination) with one live entry per route, so that finding the
+      expired routes costs O(expired + extended routes).
+    The next hop and the expiry time of a route must be changed through set_next_hop and
+    set_expiry.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.via: dict[NetAddr, set[NetAddr]] = collections.defaultdict(set)
+        self.expiries: list[tuple[int, NetAddr]] = []
+
+    def __setitem__(self, dest: NetAddr, route: RoutingTableEntry):
+        if (old := self.get(dest)) is not None:
+            self._unlink(old)
+        super().__setitem__(dest, route)
+        self.via[route.next_hop].add(dest)
+        self._schedule(route)
+
+    def __delitem__(self, dest: NetAddr):
+        self._unlink(self[dest])
+        super().__delitem__(dest)
+
+    def _unlink(self, route: RoutingTableEntry):
+        routed = self.via[route.next_hop]
+        routed.discard(route.dest)
+        if not routed:
+            del self.via[route.next_hop]
+
+    def _schedule(self, route: RoutingTableEntry):
+        route.queued_expiry = route.expiry_time
+        heapq.heappush(self.expiries, (route.expiry_time, route.dest))
+
+    def set_next_hop(self, route: RoutingTableEntry, next_hop: NetAddr):
+        if route.next_hop == next_hop:
+            return
+        self._unlink(route)
+        route.next_hop = next_hop
+        self.via[next_hop].add(route.dest)
+
+    def set_expiry(self, route: RoutingTableEntry, expiry_time: int):
+        route.expiry_time = expiry_time
+        # extensions are caught up lazily, only earlier deadlines need a new entry
+        if route.queued_expiry is None or expiry_time < route.queued_expiry:
+            self._schedule(route)
+
+    def routes_via(self, next_hop: NetAddr) -> set[NetAddr]:
+        """the destinations whose route goes through next_hop"""
+        return self.via.get(next_hop, set())
+
+    def expired(self, cur_time: int) -> list[RoutingTableEntry]:
+        """the routes whose expiry time is before cur_time, they are no longer queued"""
+        expired = []
+        while self.expiries and self.expiries[0][0] < cur_time:
+            deadline, dest = heapq.heappop(self.expiries)
+            route = self.get(dest)
+            if route is None or route.queued_expiry != deadline:
+                continue  # stale entry, the route was removed or queued again
+            if route.expiry_time < cur_time:
+                route.queued_expiry = None
+                expired.append(route)
+            else:
+                self._schedule(route)
+        return expired
 
 
 @dataclass
 class RReqInfo:
-    time: int
-    ttl: int
+    time: int  # when the last RREQ was sent
+    ttl: int  # ttl of the last RREQ
     retry_count: int  # retries after max ttl has been reached
-    backoff: int
+    backoff: int  # how long to wait for a RREP before the next RREQ
+    given_up: int = 0  # discoveries given up in a row for the destination
+    holding_off: bool = False  # given up, no new discovery until the backoff is over
+
+
+@dataclass
+class LocalRepair:
+    deadline: int  # when the repair is given up if the route is still broken
+    # the relayed packets waiting for the repaired route, by identifier
+    packets: dict[int, Packet] = field(default_factory=dict)
 
 
 class AODVRouting(BaseRouting):
-    routing_table: dict[NetAddr, RoutingTableEntry]
+    routing_table: RoutingTable
     pending_rreq_buffer: dict[NetAddr, RReqInfo]
     received_rreqs: dict[tuple[NetAddr, int], int]
+    # (time, key) of the received RREQs, in order of reception
+    received_rreqs_queue: collections.deque[tuple[int, tuple[NetAddr, int]]]
+    repairs: dict[NetAddr, LocalRepair]
     sequence_number: int
 
     def __init__(self, drone: CommunicatingEntity):
         super().__init__(drone)
 
-        self.routing_table = dict()
+        self.routing_table = RoutingTable()
         self.pending_rreq_buffer = dict()
         self.received_rreqs = dict()
+        self.received_rreqs_queue = collections.deque()
+        self.repairs = dict()
         self.sequence_number = 0
 
         self.rreq_id = itertools.count(0, 1)
@@ -121,9 +228,11 @@ class AODVRouting(BaseRouting):
             if should_update:
                 route.is_valid = True
                 route.seq_number_valid = seq != -1
-                route.next_hop = next_hop
+                self.routing_table.set_next_hop(route, next_hop)
                 route.hop_count = hop_count
-                route.expiry_time = max(route.expiry_time, self.drone.time + lifetime)
+                self.routing_table.set_expiry(
+                    route, max(route.expiry_time, self.drone.time + lifetime)
+                )
                 route.seq_number = seq
 
     def _process_rreq(self, packet: aodv.RReqPacket):
@@ -133,8 +242,11 @@ class AODVRouting(BaseRouting):
         rreq_key = (packet.src, packet.rreq_id)
         if (timestamp := self.received_rreqs.get(rreq_key)) is not None:
             if timestamp + PATH_DISCOVERY_TIME > self.drone.time:
+                self.flooding.heard(packet)
                 return
         self.received_rreqs[rreq_key] = self.drone.time
+        self.received_rreqs_queue.append((self.drone.time, rreq_key))
+        self.flooding.received(packet)
 
         self._update_route(
             addr=packet.src,
@@ -151,7 +263,12 @@ class AODVRouting(BaseRouting):
         if self.drone.address in (2, 3) and dst_addr == 4:
             print(f"{self.drone.address=} GOT RREQ {packet=}, {route=}")
 
-        if dst_addr == self.drone.address or (route is not None and route.is_valid):
+        # only a route at least as fresh as the one the source knows of is worth a RREP
+        if dst_addr == self.drone.address or (
+            route is not None
+            and route.is_valid
+            and (packet.dst_seq is None or route.seq_number >= packet.dst_seq)
+        ):
             self._generate_rrep(packet)
             return
 
@@ -162,7 +279,9 @@ class AODVRouting(BaseRouting):
                 packet.dst_seq if packet.dst_seq else 0,
                 route.seq_number if route else 0,
             )
-            self.drone.output_buffer.append(packet)
+            if self.flooding.relay(packet):
+                self.drone.output_buffer.append(packet)
+                Metrics.instance().rreq_transmissions += 1
 
     def _process_rrep(self, packet: aodv.RRepPacket):
         if self.drone.address == 2 and packet.src == 3 and packet.dst_addr == 1:
@@ -193,9 +312,9 @@ class AODVRouting(BaseRouting):
             if should_update:
                 route.is_valid = True
                 route.seq_number_valid = True
-                route.next_hop = packet.src_relay
+                self.routing_table.set_next_hop(route, packet.src_relay)
                 route.hop_count = packet.hop_count
-                route.expiry_time = self.drone.time + packet.lifetime
+                self.routing_table.set_expiry(route, self.drone.time + packet.lifetime)
                 route.seq_number = packet.dst_seq
 
         if packet.org_addr == self.drone.address:
@@ -210,27 +329,45 @@ class AODVRouting(BaseRouting):
             return
 
         packet.ttl -= 1
-        try:
-            route_to_org = self.routing_table[packet.org_addr]
-            route.precursors.add(route_to_org.next_hop)
-            self.routing_table[route.next_hop].precursors.add(route_to_org.next_hop)
-        except KeyError:
-            print("keyerror")
+        route_to_org = self.routing_table.get(packet.org_addr)
+        if route_to_org is None:  # the reverse route is gone, the RREP is lost
+            return
+        route.precursors.add(route_to_org.next_hop)
+        if (next_hop_route := self.routing_table.get(route.next_hop)) is not None:
+            next_hop_route.precursors.add(route_to_org.next_hop)
         packet.dst_relay = route_to_org.next_hop
         if packet.ttl > 0:
             self.drone.output_buffer.append(packet)
 
     def _process_rerr(self, packet: aodv.RErrPacket):
+        # every copy counts for the suppression of a held relay, even one with nothing new
+        self.flooding.heard(packet)
         unreachable: list[tuple[NetAddr, int | None]] = []
         for addr, seq in packet.destinations:
             route = self.routing_table.get(addr)
-            if route is not None and route.next_hop == packet.src:
+            # a broken route is only reported again with newer information, or RERRs loop,
+            # and a route under repair is reported when the repair fails
+            if (
+                route is not None
+                and route.next_hop == packet.src
+                and not route.is_being_repaired
+                and (route.is_valid or seq > route.seq_number)
+            ):
                 unreachable.append((addr, seq))
 
         if unreachable:
-            self._generate_rerr(unreachable)
+            self._generate_rerr(unreachable, relayed=packet)
 
-    def _generate_rerr(self, destinations: list[tuple[NetAddr, int | None]]):
+    def _generate_rerr(
+        self,
+        destinations: list[tuple[NetAddr, int | None]],
+        relayed: aodv.RErrPacket | None = None,
+    ):
+        """
+        Invalidate the routes to the destinations and report them.
+        @param relayed: the RERR received that reported them, if any, then the report is
+            subject to the broadcast storm suppression
+        """
         new_destinations = []
         for dest, seq in destinations:
             route = self.routing_table.get(dest)
@@ -253,7 +390,8 @@ class AODVRouting(BaseRouting):
                     route.seq_number += 1
 
             route.is_valid = False
-            route.expiry_time = self.drone.time + DELETE_PERIOD
+            route.is_repairable = False
+            self.routing_table.set_expiry(route, self.drone.time + DELETE_PERIOD)
             new_destinations.append((dest, route.seq_number))
 
         packet = aodv.RErrPacket(
@@ -262,7 +400,8 @@ class AODVRouting(BaseRouting):
             timestamp=self.drone.time,
             destinations=new_destinations,
         )
-        self.drone.output_buffer.append(packet)
+        if relayed is None or self.flooding.relay(packet, relayed):
+            self.drone.output_buffer.append(packet)
 
     def _generate_rrep(self, packet: aodv.RReqPacket):
         dst_addr = packet.dst_addr
@@ -316,30 +455,64 @@ class AODVRouting(BaseRouting):
         self.drone.output_buffer.append(grat_rrep)
 
     def _request_route(self, dest: NetAddr):
+        """
+        Expanding ring search: the first RREQ reaches TTL_START hops (or a bit further than the
+        last known distance), each retry widens the ring by TTL_INCREMENT and waits for the ring
+        to be traversed. Past TTL_THRESHOLD the whole network is flooded, RREQ_RETRIES more
+        times with binary exponential backoff, then the discovery is given up. Unlike RFC 3561
+        the packets for the destination are not dropped: they stay buffered until their
+        deadline, but no new discovery is started for the destination before a hold-off that
+        keeps doubling with the discoveries given up in a row (RFC 3561, 6.3).
+        """
         rreq_info = self.pending_rreq_buffer.get(dest)
 
-        if rreq_info is not None:  # route already requested
-            # backoff not complete
-            if rreq_info.time + rreq_info.backoff >= self.drone.time:
-                return
+        # backoff, or hold-off, not complete
+        if (
+            rreq_info is not None
+            and rreq_info.time + rreq_info.backoff > self.drone.time
+        ):
+            return
 
-            if rreq_info.ttl < TTL_THRESHOLD:
-                rreq_info.time = self.drone.time
-                rreq_info.backoff *= 2
-            elif rreq_info.retry_count < RREQ_RETRIES:
-                rreq_info.retry_count += 1
-            else:
-                self._route_timeout(dest)
-                return
-        else:
+        if rreq_info is None or rreq_info.holding_off:
+            ttl = TTL_START
+            route = self.routing_table.get(dest)
+            if route is not None and route.hop_count > 0:
+                ttl = route.hop_count + TTL_INCREMENT
             rreq_info = RReqInfo(
                 time=self.drone.time,
-                ttl=TTL_START,
+                ttl=min(ttl, NET_DIAMETER),
                 retry_count=0,
-                backoff=NET_TRAVERSAL_TIME,
+                backoff=0,
+                given_up=0 if rreq_info is None else rreq_info.given_up,
+            )
+            self.pending_rreq_buffer[dest] = rreq_info
+            Metrics.instance().route_discoveries += 1
+        elif rreq_info.ttl < NET_DIAMETER:
+            rreq_info.ttl += TTL_INCREMENT
+            if rreq_info.ttl > min(TTL_THRESHOLD, NET_DIAMETER):
+                rreq_info.ttl = NET_DIAMETER
+            rreq_info.time = self.drone.time
+        elif rreq_info.retry_count < RREQ_RETRIES:
+            rreq_info.retry_count += 1
+            rreq_info.time = self.drone.time
+        else:
+            rreq_info.given_up += 1
+            rreq_info.holding_off = True
+            rreq_info.time = self.drone.time
+            rreq_info.backoff = self._flood_backoff(rreq_info.given_up - 1)
+            Metrics.instance().given_up_discoveries += 1
+            logger.debug(f"Route discovery for destination {dest} given up")
+            return
+
+        if rreq_info.ttl < NET_DIAMETER:
+            rreq_info.backoff = ring_traversal_time(
+                rreq_info.ttl, self.flooding.max_delay
             )
+        else:
+            rreq_info.backoff = self._flood_backoff(rreq_info.retry_count)
 
         self.sequence_number += 1
+        route = self.routing_table.get(dest)
         packet = aodv.RReqPacket(
             source=self.drone.address,
             destination=config.BROADCAST_ADDRESS,
@@ -348,8 +521,26 @@ class AODVRouting(BaseRouting):
             hop_count=0,
             dst_addr=dest,
             org_seq=self.sequence_number,
+            dst_seq=(
+                route.seq_number
+                if route is not None and route.seq_number_valid
+                else None
+            ),
         )
+        packet.ttl = rreq_info.ttl
         self.drone.output_buffer.append(packet)
+        self.flooding.originated(packet)
+        Metrics.instance().rreq_transmissions += 1
+
+    def _flood_backoff(self, exponent: int) -> int:
+        """binary exponential backoff after a RREQ flooding the whole network"""
+        return (
+            NET_TRAVERSAL_TIME + NET_DIAMETER * self.flooding.max_delay
+        ) * 2**exponent
+
+    def batch_key(self, packet: Packet) -> Hashable:
+        # the route to the source is refreshed, and route errors depend on it
+        return packet.dst, packet.src
 
     def relay_selection(self, packet: Packet) -> NetAddr | None:
         route_info = self.routing_table.get(packet.dst)
@@ -361,23 +552,114 @@ class AODVRouting(BaseRouting):
             ]
             for r in routes_to_extend:
                 if r is not None:
-                    r.expiry_time = max(
-                        r.expiry_time, self.drone.time + ACTIVE_ROUTE_TIMEOUT
+                    self.routing_table.set_expiry(
+                        r, max(r.expiry_time, self.drone.time + ACTIVE_ROUTE_TIMEOUT)
                     )
 
+            # the discovery, if any, is over
+            self.pending_rreq_buffer.pop(packet.dst, None)
+            if packet.src != self.drone.address:
+                route_info.last_used = self.drone.time
             return route_info.next_hop
 
         if packet.src == self.drone.address:
             self._request_route(packet.dst)
-        else:
-            self._generate_rerr([(packet.dst, None)])
+        elif packet.dst not in self.repairs:  # otherwise it waits, see route_packets
+            route = self.routing_table.get(packet.dst)
+            if route is not None and route.is_repairable:
+                self._start_local_repair(route, packet.src)
+            else:
+                self._generate_rerr([(packet.dst, None)])
         return None
 
+    def route_packets(self, packets: list[Packet]) -> list[Packet]:
+        routed_packets = super().route_packets(packets)
+        if self.repairs:
+            routed = set(map(id, routed_packets))
+            for packet in packets:
+                repair = self.repairs.get(packet.dst)
+                # the buffered packets are retransmitted anyway, only relays are held
+                if (
+                    repair is not None
+                    and id(packet) not in routed
+                    and packet not in self.drone.buffer
+                ):
+                    repair.packets[packet.identifier] = packet
+        return routed_packets
+
+    def _is_repairable(self, route: RoutingTableEntry) -> bool:
+        """
+        a broken route can be repaired locally if it is actively relaying packets of others
+        and ends close by
+        """
+        return (
+            bool(route.precursors)
+            and route.last_used + ACTIVE_ROUTE_TIMEOUT >= self.drone.time
+            and 0 < route.hop_count <= MAX_REPAIR_TTL
+        )
+
+    def _start_local_repair(self, route: RoutingTableEntry, source: NetAddr):
+        """
+        Local repair (RFC 3561, 6.12): look for the destination of a broken route with a RREQ
+        scoped a bit beyond its last known distance, instead of reporting the break to the
+        precursors and having the sources flood the network again. The packets relayed
+        meanwhile wait for the outcome, see route_packets.
+        @param source: the source of the packet that needs the route
+        """
+        to_source = self.routing_table.get(source)
+        hops_to_source = to_source.hop_count if to_source is not None else 0
+        ttl = max(route.hop_count, hops_to_source // 2) + LOCAL_ADD_TTL
+
+        route.is_being_repaired = True
+        route.seq_number += 1
+        self.routing_table.set_expiry(route, self.drone.time + DELETE_PERIOD)
+        self.repairs[route.dest] = LocalRepair(
+            deadline=self.drone.time + ring_traversal_time(ttl, self.flooding.max_delay)
+        )
+        Metrics.instance().local_repairs += 1
+
+        self.sequence_number += 1
+        rreq = aodv.RReqPacket(
+            source=self.drone.address,
+            destination=config.BROADCAST_ADDRESS,
+            timestamp=self.drone.time,
+            rreq_id=next(self.rreq_id),
+            hop_count=0,
+            dst_addr=route.dest,
+            org_seq=self.sequence_number,
+            dst_seq=route.seq_number,
+        )
+        rreq.ttl = ttl
+        self.drone.output_buffer.append(rreq)
+        self.flooding.originated(rreq)
+        Metrics.instance().rreq_transmissions += 1
+
+    def _check_repairs(self):
+        """forward the packets of the repaired routes, report the routes that could not be"""
+        for dest, repair in list(self.repairs.items()):
+            route = self.routing_table.get(dest)
+            if route is not None and route.is_valid:
+                for packet in repair.packets.values():
+                    if not packet.is_expired(self.drone.time):
+                        self.drone.output_buffer.append(
+                            self.assign_relay(packet, route.next_hop)
+                        )
+            elif self.drone.time >= repair.deadline:
+                Metrics.instance().failed_local_repairs += 1
+                self._generate_rerr([(dest, None)])
+            else:
+                continue
+            if route is not None:
+                route.is_being_repaired = False
+                route.is_repairable = False
+            del self.repairs[dest]
+
     def drone_identification(self, cur_step: int) -> HelloPacket | None:
         if cur_step % config.HELLO_DELAY != 0:  # still not time to communicate
             return
 
-        packet = aodv.RRepPacket(
+        packet = self.drone.network.pool.acquire(
+            aodv.RRepPacket,
             source=self.drone.address,
             destination=config.BROADCAST_ADDRESS,
             timestamp=self.drone.time,
@@ -392,7 +674,14 @@ class AODVRouting(BaseRouting):
 
     def routing_control(self, cur_step: int) -> list[Packet]:
         self._clean()
-        return super().routing_control(cur_step)
+        if self.repairs:
+            self._check_repairs()
+        packets = super().routing_control(cur_step)
+        # the RREQ relays held by the broadcast storm suppression come out here
+        Metrics.instance().rreq_transmissions += sum(
+            type(packet) is aodv.RReqPacket for packet in packets
+        )
+        return packets
 
     def _clean(self):
         # do not clean too often
@@ -400,51 +689,52 @@ class AODVRouting(BaseRouting):
             return
         # find newly expired routes and delete old ones
         newly_broken = []
-        to_delete = []
-        for addr, route in self.routing_table.items():
-            if self.drone.time > route.expiry_time:
-                if route.is_valid:
-                    newly_broken.append(addr)
-                else:
-                    to_delete.append(addr)
-
+        destinations: list[tuple[NetAddr, int | None]] = []
+        for route in self.routing_table.expired(self.drone.time):
+            if route.is_valid:
                 route.is_valid = False
-        for addr in to_delete:
-            del self.routing_table[addr]
+                newly_broken.append(route.dest)
+            elif route.is_repairable and not route.is_being_repaired:
+                # no packet needed the route in time for a local repair, report it now
+                destinations.append((route.dest, None))
+            else:
+                del self.routing_table[route.dest]
+        expired = set(newly_broken)
 
+        # the routes through a broken destination break as well
         unreachable = set()
         while newly_broken:
             current = newly_broken.pop()
+            if current in unreachable:
+                continue
             unreachable.add(current)
-            for addr, route in self.routing_table.items():
-                if route.next_hop == current and route.next_hop not in unreachable:
-                    newly_broken.append(addr)
+            newly_broken.extend(
+                addr
+                for addr in self.routing_table.routes_via(current)
+                if addr not in unreachable
+            )
 
-        destinations: list[tuple[NetAddr, int | None]] = [
-            (addr, None) for addr in unreachable
-        ]
+        # the active routes broken by a lost next hop wait REPAIR_WAIT for a packet to start
+        # their local repair, and are only reported if it fails, the others are reported now
+        for addr in unreachable:
+            route = self.routing_table[addr]
+            if route.is_repairable:  # waiting for, or under, repair already
+                continue
+            if addr not in expired and self._is_repairable(route):
+                route.is_valid = False
+                route.is_repairable = True
+                self.routing_table.set_expiry(route, self.drone.time + REPAIR_WAIT)
+            else:
+                destinations.append((addr, None))
         if destinations:
             self._generate_rerr(destinations)
 
-        to_delete = []
-        for key, timestamp in self.received_rreqs.items():
-            if timestamp + PATH_DISCOVERY_TIME < self.drone.time:
-                to_delete.append(key)
-
-        for key in to_delete:
-            del self.received_rreqs[key]
-
-    def _route_timeout(self, destination: NetAddr):
-        to_drop = []
-        logger.debug(f"Route timeout for destination {destination}")
-        for packet in self.drone.buffer:
-            if packet.dst == destination:
-                to_drop.append(packet.identifier)
-        logger.debug(f"Dropping {len(to_drop)} packets")
-
-        self.drone.buffer = [
-            p for p in self.drone.buffer if p.identifier not in to_drop
-        ]
+        queue = self.received_rreqs_queue
+        while queue and queue[0][0] + PATH_DISCOVERY_TIME < self.drone.time:
+            timestamp, key = queue.popleft()
+            # the RREQ may have been received again since
+            if self.received_rreqs.get(key) == timestamp:
+                del self.received_rreqs[key]
 
     def has_neighbours(self) -> bool:
         return True
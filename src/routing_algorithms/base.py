@@ -1,48 +1,32 @@
 import abc
-import dataclasses
+from typing import Hashable
 
 import config
 from entities.communicating_entity import CommunicatingEntity
 from entities.event import Event
 from entities.packets import ACKPacket, DataPacket, HelloPacket, Packet
+from routing_algorithms.flooding import Flooding
+from routing_algorithms.neighbour_table import NeighbourNode, NeighbourTable
 from simulation.metrics import Metrics
-from utilities.types import NetAddr, Point
-
-
-@dataclasses.dataclass(frozen=True)
-class NeighbourNode:
-    address: NetAddr
-    timestamp: int
-    coords: Point
-    next_target: Point
-    speed: int
-
-    def __eq__(self, value: object, /) -> bool:
-        if not isinstance(value, NeighbourNode):
-            return False
-        return self.address == value.address
-
-    @staticmethod
-    def from_hello_packet(packet: HelloPacket):
-        return NeighbourNode(
-            packet.src,
-            packet.timestamp,
-            packet.cur_pos,
-            packet.next_target,
-            packet.speed,
-        )
+from utilities.types import NetAddr
 
 
 class BaseRouting(metaclass=abc.ABCMeta):
     drone: CommunicatingEntity
     retransmission_count: int
-    neighbours: dict[NetAddr, NeighbourNode]
+    neighbours: NeighbourTable
+    flooding: Flooding
+    # whether the packets with the same batch_key can share one relay decision,
+    # algorithms whose decisions are genuinely per packet opt out
+    batch_routing: bool = True
 
     def __init__(self, drone: CommunicatingEntity):
         """The drone that is doing routing and simulator object."""
         self.drone = drone
         self.retransmission_count = 0
-        self.neighbours: dict[NetAddr, NeighbourNode] = dict()
+        self.neighbours = NeighbourTable()
+        # the broadcast storm suppression policy of the floods relayed
+        self.flooding = config.broadcast_suppression.value(drone)
 
     @abc.abstractmethod
     def relay_selection(self, packet: Packet) -> NetAddr | None:
@@ -71,14 +55,15 @@ class BaseRouting(metaclass=abc.ABCMeta):
                 self.retransmission_count = 0
 
     def process_hello(self, packet: HelloPacket):
-        self.neighbours[packet.src] = NeighbourNode.from_hello_packet(packet)
+        self.neighbours.update(packet)
 
     def drone_identification(self, cur_step: int) -> HelloPacket | None:
         """handle drone hello messages to identify neighbors"""
         if cur_step % config.HELLO_DELAY != 0:  # still not time to communicate
             return
 
-        return HelloPacket(
+        return self.drone.network.pool.acquire(
+            HelloPacket,
             self.drone.address,
             config.BROADCAST_ADDRESS,
             cur_step,
@@ -89,18 +74,14 @@ class BaseRouting(metaclass=abc.ABCMeta):
 
     def update_neighbours(self, cur_step: int):
         """delete neighbour nodes that didn't send HelloPackets in a while"""
-        to_delete = []
-        for neighbour in self.neighbours.values():
-            if neighbour.timestamp + config.OLD_HELLO_PACKET < cur_step:
-                to_delete.append(neighbour.address)
-        for n in to_delete:
-            del self.neighbours[n]
+        self.neighbours.expire(cur_step)
 
     def routing_control(self, cur_step: int) -> list[Packet]:
         self.update_neighbours(cur_step)
         packets = []
         if hello_packet := self.drone_identification(cur_step):
             packets.append(hello_packet)
+        packets.extend(self.flooding.due(cur_step))
         return packets
 
     def route_packet(self, packet: Packet) -> Packet | None:
@@ -109,18 +90,54 @@ class BaseRouting(metaclass=abc.ABCMeta):
         if best_neighbor is None:
             return
 
+        return self.assign_relay(packet, best_neighbor)
+
+    def assign_relay(self, packet: Packet, relay: NetAddr) -> Packet:
         # TODO: handle ttl
-        packet.dst_relay = best_neighbor
+        packet.dst_relay = relay
         packet.src_relay = self.drone.address
         self.retransmission_count += 1
         return packet
 
+    def batch_key(self, packet: Packet) -> Hashable:
+        """packets with the same key get the same relay decision"""
+        return packet.dst
+
+    def route_packets(self, packets: list[Packet]) -> list[Packet]:
+        """
+        Route a batch of packets, taking one relay decision per batch_key.
+        @return: the routed packets, with their relay assigned, in their original order
+        """
+        if not self.batch_routing:
+            return [p for packet in packets if (p := self.route_packet(packet))]
+
+        decisions: dict[Hashable, NetAddr | None] = {}
+        routed_packets = []
+        for packet in packets:
+            key = self.batch_key(packet)
+            if key not in decisions:
+                Metrics.instance().mean_numbers_of_possible_relays.append(
+                    len(self.neighbours)
+                )
+                decisions[key] = self.relay_selection(packet)
+            if (relay := decisions[key]) is not None:
+                routed_packets.append(self.assign_relay(packet, relay))
+        return routed_packets
+
     def has_neighbours(self) -> bool:
         return len(self.neighbours) > 0
 
     def should_forward(self, packet: Packet) -> bool:
         return True
 
+    def feedback(self, outcomes: list[tuple[int, int, int]]):
+        """
+        Feedback returned by the depot on the events delivered or expired in the last step,
+        only the learning algorithms use it.
+        @param outcomes: (id event, delay, outcome) with outcome 1 if a packet of the event
+            has been delivered to the depot and -1 if it expired
+        """
+
     def make_data_packet(self, event: Event, cur_step: int) -> DataPacket:
         return DataPacket(self.drone.address, config.DEPOT_ADDRESS, cur_step, event)
 
@@ -0,0 +1,163 @@
+import heapq
+import itertools
+import math
+from dataclasses import dataclass
+from typing import Hashable
+
+from numpy.random import RandomState
+
+import config
+from entities.communicating_entity import CommunicatingEntity
+from entities.packets import Packet
+from simulation.metrics import Metrics
+
+"""
+Broadcast storm suppression: the policies a router applies to the floods it relays
+(AODV RREQs and RERRs, OLSR TCs). Plain flooding relays every broadcast once; the other
+policies, after Tseng et al. "The broadcast storm problem in a mobile ad hoc network", give
+up some relays when the neighbourhood has most likely been covered already.
+The policy of a router is its `flooding` attribute, built from config.broadcast_suppression
+and replaceable router by router.
+"""
+
+
+@dataclass
+class PendingRelay:
+    packet: Packet  # the packet to relay
+    deadline: int  # end of the random assessment delay
+    copies: int = 1  # copies of the broadcast heard so far
+    min_distance: float = math.inf  # distance of the closest transmitter heard so far
+
+
+class Flooding:
+    """Plain flooding: every broadcast is relayed as soon as it is received."""
+
+    max_delay = 0  # the most a relay can be held, in time steps
+
+    def __init__(self, drone: CommunicatingEntity):
+        self.drone = drone
+
+    def originated(self, packet: Packet):
+        """the router starts a flood"""
+        Metrics.instance().floods[type(packet).__name__] += 1
+
+    def received(self, packet: Packet):
+        """first reception of a flood"""
+        Metrics.instance().flood_receptions[type(packet).__name__] += 1
+
+    def heard(self, packet: Packet):
+        """another copy of a broadcast received already"""
+
+    def relay(self, packet: Packet, received: Packet | None = None) -> bool:
+        """
+        Decide whether to relay a broadcast.
+        @param packet: the packet to send
+        @param received: the broadcast that triggered it, if it is not the packet itself
+        @return: whether to send the packet now, if not it is either suppressed or held
+            and then sent by due
+        """
+        self._relayed(packet)
+        return True
+
+    def due(self, cur_step: int) -> list[Packet]:
+        """the held relays to send now"""
+        return []
+
+    @staticmethod
+    def _relayed(packet: Packet):
+        Metrics.instance().rebroadcasts[type(packet).__name__] += 1
+
+    @staticmethod
+    def _suppressed(packet: Packet):
+        Metrics.instance().suppressed_rebroadcasts[type(packet).__name__] += 1
+
+
+class GossipSuppression(Flooding):
+    """Probabilistic flooding: each broadcast is relayed with probability GOSSIP_PROBABILITY."""
+
+    def __init__(self, drone: CommunicatingEntity):
+        super().__init__(drone)
+        self.random = RandomState([config.seed, drone.address])
+
+    def relay(self, packet: Packet, received: Packet | None = None) -> bool:
+        if self.random.rand() < config.GOSSIP_PROBABILITY:
+            self._relayed(packet)
+            return True
+        self._suppressed(packet)
+        return False
+
+
+class AssessedSuppression(Flooding):
+    """
+    Relays held for a random assessment delay, during which the copies of the broadcast heard
+    from the other relays are accounted; at its end the relay is sent unless should_suppress.
+    Relays are keyed by the flood_key of the broadcast, which its copies share.
+    """
+
+    def __init__(self, drone: CommunicatingEntity):
+        super().__init__(drone)
+        self.max_delay = config.MAX_ASSESSMENT_DELAY
+        self.random = RandomState([config.seed, drone.address])
+        self.pending: dict[Hashable, PendingRelay] = dict()
+        # (deadline, order, key), the order breaks the ties, keys need not be comparable
+        self.deadlines: list[tuple[int, int, Hashable]] = []
+        self.order = itertools.count()
+
+    def heard(self, packet: Packet):
+        pending = self.pending.get(packet.flood_key)
+        if pending is not None:
+            pending.copies += 1
+            pending.min_distance = min(pending.min_distance, packet.rx_distance)
+
+    def relay(self, packet: Packet, received: Packet | None = None) -> bool:
+        received = packet if received is None else received
+        key = packet.flood_key
+        if key in self.pending:  # the same broadcast is held already
+            self._suppressed(packet)
+            return False
+        pending = PendingRelay(
+            packet,
+            deadline=self.drone.time + self.random.randint(1, self.max_delay + 1),
+            min_distance=received.rx_distance,
+        )
+        if self.should_suppress(pending):
+            self._suppressed(packet)
+            return False
+        self.pending[key] = pending
+        heapq.heappush(self.deadlines, (pending.deadline, next(self.order), key))
+        return False
+
+    def due(self, cur_step: int) -> list[Packet]:
+        packets = []
+        while self.deadlines and self.deadlines[0][0] <= cur_step:
+            _, _, key = heapq.heappop(self.deadlines)
+            pending = self.pending.pop(key)
+            if self.should_suppress(pending):
+                self._suppressed(pending.packet)
+            else:
+                self._relayed(pending.packet)
+                packets.append(pending.packet)
+        return packets
+
+    def should_suppress(self, pending: PendingRelay) -> bool:
+        return False
+
+
+class CounterSuppression(AssessedSuppression):
+    """Counter-based scheme: the relay is given up once COUNTER_THRESHOLD copies are heard."""
+
+    def should_suppress(self, pending: PendingRelay) -> bool:
+        return pending.copies >= config.COUNTER_THRESHOLD
+
+
+class DistanceSuppression(AssessedSuppression):
+    """
+    Distance-based scheme: the relay is given up if a copy comes from closer than
+    DISTANCE_THRESHOLD times the communication range, the extra area it would cover being small.
+    """
+
+    def should_suppress(self, pending: PendingRelay) -> bool:
+        return (
+            pending.min_distance
+            < config.DISTANCE_THRESHOLD * self.drone.communication_range
+        )
@@ -0,0 +1,97 @@
+import config
+from entities.packets import DataPacket, Packet
+from entities.packets.gradient import BeaconPacket
+from routing_algorithms.base import BaseRouting
+from utilities.types import NetAddr
+
+
+class GradientRouting(BaseRouting):
+    """
+    Depot-rooted gradient routing. Every BEACON_DELAY steps the depot floods a beacon, which
+    each drone relays once per round with its own distance in hops. A drone keeps as parent
+    the transmitter of the best beacon of the latest round (fewest hops, then closest) and
+    sends the data packets to the depot to it. The ACKs go back along the path of the data
+    packets, every router remembering the neighbour the packets of each source came from.
+    The control overhead is a beacon per router and round.
+    """
+
+    def __init__(self, drone):
+        BaseRouting.__init__(self, drone)
+        self.round = -1  # the latest beacon round, heard or started by the depot
+        self.round_time = -1  # start of the latest round
+        self.parent: NetAddr | None = None
+        self.hops = 0  # distance from the depot through the parent
+        self.parent_distance = 0.0
+        # source -> neighbour its data packets came from, the way back of the ACKs
+        self.children: dict[NetAddr, NetAddr] = dict()
+
+    def process(self, packet: Packet):
+        if isinstance(packet, BeaconPacket):
+            self.process_beacon(packet)
+            return
+
+        if isinstance(packet, DataPacket):
+            self.children[packet.src] = packet.src_relay
+        super().process(packet)
+
+    def process_beacon(self, packet: BeaconPacket):
+        if self.drone.address == config.DEPOT_ADDRESS or packet.round < self.round:
+            return
+
+        hops = packet.hop_count + 1
+        if packet.round == self.round:
+            self.flooding.heard(packet)
+            if (hops, packet.rx_distance) < (self.hops, self.parent_distance):
+                self.parent, self.hops = packet.src_relay, hops
+                self.parent_distance = packet.rx_distance
+            return
+
+        # first beacon of a new round, relayed with the distance of this drone
+        self.flooding.received(packet)
+        self.round, self.round_time = packet.round, packet.timestamp
+        self.parent, self.hops = packet.src_relay, hops
+        self.parent_distance = packet.rx_distance
+        packet.hop_count = hops
+        if self.flooding.relay(packet):
+            self.drone.output_buffer.append(packet)
+
+    def routing_control(self, cur_step: int) -> list[Packet]:
+        packets = super().routing_control(cur_step)
+        if (
+            self.drone.address == config.DEPOT_ADDRESS
+            and cur_step % config.BEACON_DELAY == 0
+        ):
+            self.round += 1
+            self.round_time = cur_step
+            beacon = self.drone.network.pool.acquire(
+                BeaconPacket,
+                self.drone.address,
+                config.BROADCAST_ADDRESS,
+                cur_step,
+                self.round,
+            )
+            self.flooding.originated(beacon)
+            packets.append(beacon)
+        return packets
+
+    def relay_selection(self, packet: Packet) -> NetAddr | None:
+        """
+        This function returns the parent for the packets to the depot, the neighbour the
+        packets of the destination came from for the others.
+
+        @return: The best drone to use as relay or None if no relay is selected
+        """
+        if packet.dst in self.neighbours:
+            return packet.dst
+
+        if packet.dst == config.DEPOT_ADDRESS:
+            if self.drone.time - self.round_time > config.BEACON_TIMEOUT:
+                return None
+            return self.parent
+
+        return self.children.get(packet.dst)
+
+    def should_forward(self, packet: Packet) -> bool:
+        # relays do not keep the packets, the hop limit ends the loops of a changing gradient
+        packet.hop_count += 1
+        return packet.hop_count < packet.ttl
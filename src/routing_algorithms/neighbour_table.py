@@ -0,0 +1,188 @@
+import dataclasses
+import heapq
+from typing import Iterator
+
+import numpy as np
+
+import config
+from entities.packets import HelloPacket
+from utilities.types import NetAddr, Point
+
+""" NeighbourTable stores the last hello of every neighbour of a router. """
+
+
+@dataclasses.dataclass(frozen=True)
+class NeighbourNode:
+    address: NetAddr
+    timestamp: int
+    coords: Point
+    next_target: Point
+    speed: int
+
+    def __eq__(self, value: object, /) -> bool:
+        if not isinstance(value, NeighbourNode):
+            return False
+        return self.address == value.address
+
+    @staticmethod
+    def from_hello_packet(packet: HelloPacket):
+        return NeighbourNode(
+            packet.src,
+            packet.timestamp,
+            packet.cur_pos,
+            packet.next_target,
+            packet.speed,
+        )
+
+
+class NeighbourTable:
+    """
+    The neighbours of a router, kept in a float array with one row per network address
+    (addresses are small integers, the array grows on demand). Besides the hello fields, each
+    row stores the per-step velocity towards the next target and the step of arrival there,
+    used to predict the current position of the neighbours in one vectorized pass.
+    Expiries go through a heap of (deadline, address) with one entry per neighbour: a
+    neighbour refreshed by a newer hello is pushed back with its new deadline when its old one
+    comes up, so a step without expiries costs a single comparison.
+    The table reads like a dict of NeighbourNode (in, len, iteration over the addresses, get,
+    values), nodes are only built when asked for.
+    """
+
+    # columns of the rows
+    TIMESTAMP, X, Y, TARGET_X, TARGET_Y, SPEED, VX, VY, ARRIVAL = range(9)
+
+    def __init__(self, capacity: int = 16):
+        self.rows = np.zeros((capacity, 9))
+        # present addresses, in order of discovery
+        self.order: dict[NetAddr, None] = dict()
+        self.expiries: list[tuple[int, NetAddr]] = []
+        # derived arrays, dropped whenever the table changes
+        self._addresses: np.ndarray | None = None
+        self._positions: np.ndarray | None = None
+        self._positions_step = -1
+
+    def update(self, packet: HelloPacket):
+        """store the hello packet of a neighbour"""
+        address, timestamp = packet.src, packet.timestamp
+        if address >= len(self.rows):
+            self._grow(address + 1)
+        if address not in self.order:
+            self.order[address] = None
+            self._addresses = None
+            heapq.heappush(
+                self.expiries, (timestamp + config.OLD_HELLO_PACKET, address)
+            )
+        (x, y), (target_x, target_y) = packet.cur_pos, packet.next_target
+        length = ((target_x - x) ** 2 + (target_y - y) ** 2) ** 0.5
+        step_length = packet.speed * config.time_step_duration
+        if length == 0 or step_length == 0:
+            vx, vy, arrival = 0, 0, timestamp
+        else:
+            scale = step_length / length
+            vx, vy = (target_x - x) * scale, (target_y - y) * scale
+            arrival = timestamp + length / step_length
+        self.rows[address] = (
+            timestamp,
+            x,
+            y,
+            target_x,
+            target_y,
+            packet.speed,
+            vx,
+            vy,
+            arrival,
+        )
+        self._positions = None
+
+    def timestamp(self, address: NetAddr) -> int:
+        """the step of the last hello of the neighbour"""
+        return int(self.rows[address, self.TIMESTAMP])
+
+    def expire(self, cur_step: int) -> list[NetAddr]:
+        """
+        Remove the neighbours whose last hello is older than OLD_HELLO_PACKET steps.
+        @return: the addresses of the removed neighbours
+        """
+        expired = []
+        while self.expiries and self.expiries[0][0] < cur_step:
+            _, address = heapq.heappop(self.expiries)
+            if address not in self.order:
+                continue
+            deadline = self.timestamp(address) + config.OLD_HELLO_PACKET
+            if deadline < cur_step:
+                self._remove(address)
+                expired.append(address)
+            else:  # refreshed since it was pushed
+                heapq.heappush(self.expiries, (deadline, address))
+        return expired
+
+    def _remove(self, address: NetAddr):
+        del self.order[address]
+        self._addresses = None
+        self._positions = None
+
+    def _grow(self, size: int):
+        grown = np.zeros((max(size, 2 * len(self.rows)), self.rows.shape[1]))
+        grown[: len(self.rows)] = self.rows
+        self.rows = grown
+
+    def addresses(self) -> np.ndarray:
+        """the addresses of the neighbours, in order of discovery"""
+        if self._addresses is None:
+            self._addresses = np.fromiter(self.order, dtype=np.int64, count=len(self))
+        return self._addresses
+
+    def predicted_positions(self, cur_step: int) -> np.ndarray:
+        """
+        Dead reckoning of the neighbours: each one flies from its hello position towards its
+        next target at its speed, and stops at the target.
+        @return: the estimated positions at cur_step, one row per address of addresses()
+        """
+        if self._positions is None or self._positions_step != cur_step:
+            rows = self.rows[self.addresses()]
+            elapsed = (
+                np.minimum(rows[:, self.ARRIVAL], cur_step) - rows[:, self.TIMESTAMP]
+            )
+            self._positions = (
+                rows[:, self.X : self.Y + 1]
+                + rows[:, self.VX : self.VY + 1] * elapsed[:, None]
+            )
+            self._positions_step = cur_step
+        return self._positions
+
+    def get(self, address: NetAddr, default=None) -> NeighbourNode | None:
+        if address not in self.order:
+            return default
+        timestamp, x, y, target_x, target_y, speed = self.rows[address, : self.VX]
+        return NeighbourNode(
+            address,
+            int(timestamp),
+            (float(x), float(y)),
+            (float(target_x), float(target_y)),
+            float(speed),
+        )
+
+    def __getitem__(self, address: NetAddr) -> NeighbourNode:
+        if address not in self.order:
+            raise KeyError(address)
+        return self.get(address)
+
+    def __delitem__(self, address: NetAddr):
+        if address not in self.order:
+            raise KeyError(address)
+        self._remove(address)
+
+    def values(self) -> list[NeighbourNode]:
+        return [self.get(address) for address in self.order]
+
+    def keys(self):
+        return self.order.keys()
+
+    def __contains__(self, address: NetAddr) -> bool:
+        return address in self.order
+
+    def __iter__(self) -> Iterator[NetAddr]:
+        return iter(self.order)
+
+    def __len__(self) -> int:
+        return len(self.order)
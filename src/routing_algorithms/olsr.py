@@ -1,7 +1,7 @@
 import itertools
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass
-from typing import Literal
+from typing import Hashable, Literal
 
 import config
 from entities.communicating_entity import CommunicatingEntity
@@ -12,8 +12,14 @@ from entities.packets.olsr import (LinkCode, LinkType, NeighbourType,
                                    OLSRHelloPacket, OLSRPacket,
                                    OLSRTopologyControlPacket)
 from routing_algorithms.base import BaseRouting
+from simulation.metrics import Metrics
 from utilities.types import NetAddr
 
+# willingness of a node to relay for the others (RFC 3626, 18.8)
+WILL_NEVER = 0
+WILL_DEFAULT = 3
+WILL_ALWAYS = 7
+
 
 @dataclass
 class LinkTuple:
@@ -76,25 +82,53 @@ def get_link_type(link: LinkTuple, cur_time: int) -> LinkType:
 
 class OLSRRouting(BaseRouting):
     links: dict[NetAddr, LinkTuple]
+    # the link set advertised in the hellos: neighbour address -> link code, updated as the
+    # links and the MPRs change
+    link_codes: dict[NetAddr, LinkCode]
+    # whether link_codes is shared with the last hello sent, it is then copied on write
+    link_codes_sent: bool
+    # (validity time, address) of the hellos received, in order: when the link type may drop
+    link_queue: deque[tuple[int, NetAddr]]
     neighbours: dict[NetAddr, NeigbourTuple]
     two_hop_neighbours: dict[tuple[NetAddr, NetAddr], TwoHopNeigbourTuple]
+    # (expiry time, key) of the two-hop tuples, in order of expiry
+    two_hop_queue: deque[tuple[int, tuple[NetAddr, NetAddr]]]
     mprs: set[NetAddr]
     mpr_selectors: dict[NetAddr, MprSelectorTuple]
-    topology_info: set[TopologyTuple]
-    routing_table: set[RouteTuple]
+    # last address -> address -> topology tuple
+    topology: dict[NetAddr, dict[NetAddr, TopologyTuple]]
+    # destination -> shortest route
+    routing_table: dict[NetAddr, RouteTuple]
+    # destination -> neighbour to send to, derived from routing_table
+    first_hops: dict[NetAddr, NetAddr]
     duplicate_set: dict[tuple[NetAddr, int], DuplicateTuple]
+    # (expiry time, key) of the duplicate tuples, in order of expiry
+    duplicate_queue: deque[tuple[int, tuple[NetAddr, int]]]
     willingness: int
+    # whether the neighbours / two-hop neighbours, or the topology, changed since the last
+    # computation of the MPRs and of the routes
+    neighbourhood_changed: bool
+    topology_changed: bool
 
     def __init__(self, drone: CommunicatingEntity):
         super().__init__(drone)
         self.links = dict()
+        self.link_codes = dict()
+        self.link_codes_sent = False
+        self.link_queue = deque()
         self.neighbours = dict()
         self.two_hop_neighbours = dict()
+        self.two_hop_queue = deque()
         self.mprs = set()
         self.mpr_selectors = dict()
-        self.topology_info = set()
+        self.topology = dict()
+        self.routing_table = dict()
+        self.first_hops = dict()
         self.duplicate_set = dict()
-        self.willingness = 3
+        self.duplicate_queue = deque()
+        self.willingness = WILL_DEFAULT
+        self.neighbourhood_changed = False
+        self.topology_changed = False
         self.ansn = itertools.count(0, 1)
         self.sequence_number = itertools.count(0, 1)
 
@@ -106,20 +140,28 @@ class OLSRRouting(BaseRouting):
             return
 
         if (packet.src, packet.sequence_number) in self.duplicate_set:
+            self.flooding.heard(packet)
+            # the first copy may have come from a node that did not select this one as MPR
+            if packet.dst == config.BROADCAST_ADDRESS and self.should_forward(packet):
+                self.drone.retransmission_buffer.add(packet)
             return
 
-        self.duplicate_set[(packet.src, packet.sequence_number)] = DuplicateTuple(
-            address=packet.src,
-            seq=packet.sequence_number,
-            retransmitted=False,
-            time=self.drone.time,
+        self._add_duplicate(
+            DuplicateTuple(
+                address=packet.src,
+                seq=packet.sequence_number,
+                retransmitted=False,
+                time=self.drone.time + config.duplicate_hold_time,
+            )
         )
 
         if isinstance(packet, OLSRTopologyControlPacket):
+            self.flooding.received(packet)
             self.process_tc(packet)
         super().process(packet)
 
     def should_forward(self, packet: Packet) -> bool:
+        """default forwarding algorithm (RFC 3626, 3.4.1): floods are relayed by MPRs only"""
         assert isinstance(packet, OLSRPacket)
         if (
             packet.src,
@@ -136,54 +178,80 @@ class OLSRRouting(BaseRouting):
             return False
 
         retransmit = packet.src_relay in self.mpr_selectors and packet.ttl > 1
+        if packet.dst == config.BROADCAST_ADDRESS and not retransmit:
+            return False
 
-        dt = self.duplicate_set.get(
-            (packet.src, packet.sequence_number),
-            DuplicateTuple(
+        dt = self.duplicate_set.get((packet.src, packet.sequence_number))
+        if dt is None:
+            dt = DuplicateTuple(
                 address=packet.src,
                 seq=packet.sequence_number,
                 retransmitted=retransmit,
                 time=self.drone.time + config.duplicate_hold_time,
-            ),
-        )
+            )
+            self._add_duplicate(dt)
         dt.retransmitted = True
-        self.duplicate_set[(packet.src, packet.sequence_number)] = dt
         packet.ttl -= 1
         packet.hop_count += 1
+        if packet.dst != config.BROADCAST_ADDRESS:
+            return True
+        # the relays held by the broadcast storm suppression are counted when sent
+        if not self.flooding.relay(packet):
+            return False
+        Metrics.instance().tc_forwards_per_step[self.drone.time] += 1
         return True
 
+    def _add_duplicate(self, duplicate: DuplicateTuple):
+        key = (duplicate.address, duplicate.seq)
+        self.duplicate_set[key] = duplicate
+        # all the tuples are held as long, the queue stays in order of expiry
+        self.duplicate_queue.append((duplicate.time, key))
+
+    def expire_duplicates(self, cur_step: int):
+        """forget the messages received more than duplicate_hold_time steps ago"""
+        queue = self.duplicate_queue
+        while queue and queue[0][0] < cur_step:
+            _, key = queue.popleft()
+            del self.duplicate_set[key]
+
     def get_neighbour_type(self, address: NetAddr) -> NeighbourType:
         if address in self.mprs:
             return "MPR_NEIGH"
 
-        neighbours_for_link = list(
-            filter(lambda n: n.address == address, self.neighbours.values())
-        )
-        if len(neighbours_for_link) == 0:
+        neighbour = self.neighbours.get(address)
+        if neighbour is None:
             raise Exception("Cannot determine neighbour type")
 
-        neighbour = neighbours_for_link[0]
         if neighbour.status == "sym":
             return "SYM_NEIGH"
         return "NOT_NEIGH"
 
-    def drone_identification(self, cur_step: int) -> HelloPacket | None:
-        if super().drone_identification(cur_step) is None:
-            return
-        links_for_hello: dict[LinkCode, list[NetAddr]] = defaultdict(list)
-        for link in self.links.values():
+    def update_link_code(self, address: NetAddr):
+        """recompute the link code of a neighbour, after its link or its MPR status changed"""
+        link = self.links.get(address)
+        code = None
+        if link is not None:
             code = LinkCode(
-                get_link_type(link, cur_step), self.get_neighbour_type(link.address)
+                get_link_type(link, self.drone.time), self.get_neighbour_type(address)
             )
-            links_for_hello[code].append(link.address)
+        if self.link_codes.get(address) == code:
+            return
 
-        covered_addresses = list(itertools.chain(links_for_hello.values()))
-        for neigh in self.neighbours.values():
-            if neigh.address not in covered_addresses:
-                code = LinkCode("UNSPEC_LINK", self.get_neighbour_type(neigh.address))
-                links_for_hello[code].append(neigh.address)
+        if self.link_codes_sent:
+            # the receivers of the last hello are yet to copy it
+            self.link_codes = dict(self.link_codes)
+            self.link_codes_sent = False
+        if code is None:
+            del self.link_codes[address]
+        else:
+            self.link_codes[address] = code
 
-        olsr_packet = OLSRHelloPacket(
+    def drone_identification(self, cur_step: int) -> HelloPacket | None:
+        if cur_step % config.HELLO_DELAY != 0:  # still not time to communicate
+            return
+
+        olsr_packet = self.drone.network.pool.acquire(
+            OLSRHelloPacket,
             self.drone.address,
             config.BROADCAST_ADDRESS,
             cur_step,
@@ -194,7 +262,8 @@ class OLSRRouting(BaseRouting):
         )
         olsr_packet.willingness = self.willingness
         olsr_packet.htime = config.HELLO_DELAY
-        olsr_packet.links = links_for_hello
+        olsr_packet.links = self.link_codes
+        self.link_codes_sent = True
 
         return olsr_packet
 
@@ -214,148 +283,212 @@ class OLSRRouting(BaseRouting):
             ),
         )
         link.asym_time = validity_time
-        for link_code, addresses in packet.links.items():
-            if self.drone.address in addresses:
-                if link_code.link_type == "LOST_LINK":
-                    link.sym_time = self.drone.time - 1
-                elif link_code.link_type in ("ASYM_LINK", "SYM_LINK"):
-                    link.sym_time = validity_time
-                    link.time = link.sym_time + config.OLD_HELLO_PACKET
-                break
+        own_code = packet.links.get(self.drone.address)
+        if own_code is not None:
+            if own_code.link_type == "LOST_LINK":
+                link.sym_time = self.drone.time - 1
+            elif own_code.link_type in ("ASYM_LINK", "SYM_LINK"):
+                link.sym_time = validity_time
+                link.time = link.sym_time + config.OLD_HELLO_PACKET
         link.time = max(link.time, link.asym_time)
         self.links[link.address] = link
 
         # update neigbour set
-        neighbour = self.neighbours.get(
-            packet.src,
-            NeigbourTuple(
+        neighbour = self.neighbours.get(packet.src)
+        if neighbour is None:
+            neighbour = NeigbourTuple(
                 address=packet.src,
                 status="not_sym",
                 willingness=packet.willingness,
-            ),
-        )
-        if link.sym_time >= self.drone.time:
+            )
+            self.neighbours[packet.src] = neighbour
+            self.neighbourhood_changed = True
+        if link.sym_time >= self.drone.time and neighbour.status != "sym":
             neighbour.status = "sym"
-        self.neighbours[packet.src] = neighbour
+            self.neighbourhood_changed = True
+        self.update_link_code(packet.src)
+        # all the links are held as long, the queue stays in order
+        self.link_queue.append((validity_time, packet.src))
 
         # update 2-hop neighbours
-        for link_code, addresses in packet.links.items():
+        for address, link_code in packet.links.items():
             if link_code.neighbour_type in ("SYM_NEIGH", "MPR_NEIGH"):
-                for address in addresses:
-                    if address == self.drone.address:
-                        continue
+                if address == self.drone.address:
+                    continue
 
-                    neighbour = self.two_hop_neighbours.get(
-                        (packet.src, address),
-                        TwoHopNeigbourTuple(packet.src, address, validity_time),
+                key = (packet.src, address)
+                two_hop = self.two_hop_neighbours.get(key)
+                if two_hop is None:
+                    self.two_hop_neighbours[key] = TwoHopNeigbourTuple(
+                        packet.src, address, validity_time
                     )
-                    self.two_hop_neighbours[(packet.src, address)] = neighbour
+                    self.neighbourhood_changed = True
+                else:
+                    two_hop.time = validity_time
+                # all the tuples are held as long, the queue stays in order of expiry
+                self.two_hop_queue.append((validity_time, key))
             elif link_code.neighbour_type == "NOT_NEIGH":
-                for address in addresses:
-                    if (packet.src, address) in self.two_hop_neighbours:
-                        del self.two_hop_neighbours[(packet.src, address)]
+                if (packet.src, address) in self.two_hop_neighbours:
+                    del self.two_hop_neighbours[(packet.src, address)]
+                    self.neighbourhood_changed = True
 
         # update mpr selectors
-        for link_code, addresses in packet.links.items():
-            if self.drone.address in addresses:
-                if link_code.neighbour_type == "MPR_NEIGH":
-                    selector = self.mpr_selectors.get(
-                        packet.src, MprSelectorTuple(packet.src, validity_time)
-                    )
-                    selector.time = validity_time
-                    self.mpr_selectors[packet.src] = selector
-                break
+        if own_code is not None and own_code.neighbour_type == "MPR_NEIGH":
+            selector = self.mpr_selectors.get(
+                packet.src, MprSelectorTuple(packet.src, validity_time)
+            )
+            selector.time = validity_time
+            self.mpr_selectors[packet.src] = selector
 
     def process_tc(self, packet: OLSRTopologyControlPacket):
         if packet.src_relay not in self.neighbours:
             return
+        if packet.src == self.drone.address:
+            return
 
-        for tt in self.topology_info:
-            if tt.last_address == packet.src and tt.seq > packet.ansn:
-                return
-
-        temp_topology_dict = dict()
-        for tt in self.topology_info:
-            if tt.last_address == packet.src and tt.seq < packet.ansn:
-                continue
-            temp_topology_dict[(tt.last_address, tt.address)] = tt
+        # the tuples of a source all come from its last TC, they share its ansn
+        advertised = self.topology.get(packet.src, {})
+        seq = next(iter(advertised.values())).seq if advertised else -1
+        if seq > packet.ansn:
+            return
 
+        # the tuples of an older TC are replaced
+        topology = dict(advertised) if seq == packet.ansn else dict()
         for neigbhour in packet.advertised_neigbours:
-            tt = temp_topology_dict.get(
-                (packet.src, neigbhour),
-                TopologyTuple(
+            if neigbhour != self.drone.address and neigbhour not in topology:
+                topology[neigbhour] = TopologyTuple(
                     address=neigbhour,
                     last_address=packet.src,
                     seq=packet.ansn,
                     time=self.drone.time + packet.vtime,
-                ),
-            )
-            temp_topology_dict[(tt.last_address, tt.address)] = tt
+                )
 
-        self.topology_info = set()
-        for t in temp_topology_dict.values():
-            if t.address != self.drone.address and t.last_address != self.drone.address:
-                self.topology_info.add(t)
+        if topology.keys() != advertised.keys():
+            self.topology_changed = True
+        if topology:
+            self.topology[packet.src] = topology
+        else:
+            self.topology.pop(packet.src, None)
 
     def update_routing_table(self):
-        self.routing_table = set()
-
+        """
+        Shortest routes: the symmetric neighbours, the two-hop neighbours through them, then a
+        breadth first search of the topology. The first hops are recomputed when the routes
+        change.
+        """
+        routing_table: dict[NetAddr, RouteTuple] = dict()
         for n in self.neighbours.values():
             if n.status == "sym":
-                self.routing_table.add(
-                    RouteTuple(
-                        destination_address=n.address, next_address=n.address, dist=1
-                    )
+                routing_table[n.address] = RouteTuple(
+                    destination_address=n.address, next_address=n.address, dist=1
                 )
-        if len(self.routing_table) == 0:
-            return
 
-        for n in self.two_hop_neighbours.values():
-            if self.neighbours[n.address].status == "sym":
-                self.routing_table.add(
-                    RouteTuple(
-                        destination_address=n.two_hop_address,
-                        next_address=n.address,
-                        dist=2,
-                    )
+        if routing_table:
+            # each two-hop neighbour through the neighbour that advertised it last
+            two_hops: dict[NetAddr, TwoHopNeigbourTuple] = dict()
+            for n in self.two_hop_neighbours.values():
+                if (
+                    n.two_hop_address not in routing_table
+                    and self.neighbours[n.address].status == "sym"
+                ):
+                    best = two_hops.get(n.two_hop_address)
+                    if best is None or n.time > best.time:
+                        two_hops[n.two_hop_address] = n
+            for n in two_hops.values():
+                routing_table[n.two_hop_address] = RouteTuple(
+                    destination_address=n.two_hop_address,
+                    next_address=n.address,
+                    dist=2,
                 )
 
-        dist = 2
-        visited = {}
-        for r in self.routing_table:
-            if (
-                r.destination_address not in visited
-                or visited[r.destination_address] > r.dist
-            ):
-                visited[r.destination_address] = r.dist
-
-        new_neigbour = True
-        while new_neigbour:
-            new_neigbour = False
-            for tt in self.topology_info:
-                if tt.address in visited or tt.last_address not in visited:
-                    continue
-
-                if visited[tt.last_address] != dist:
-                    continue
-
-                new_neigbour = True
-                self.routing_table.add(
-                    RouteTuple(
-                        destination_address=tt.address,
-                        next_address=tt.last_address,
-                        dist=dist + 1,
-                    )
+            # breadth first from the two-hop neighbours, in order of discovery
+            dist = 2
+            frontier = [r.destination_address for r in routing_table.values()]
+            frontier = [d for d in frontier if routing_table[d].dist == dist]
+            while frontier:
+                next_frontier = []
+                for last_address in frontier:
+                    for address in self.topology.get(last_address, ()):
+                        if address in routing_table:
+                            continue
+                        routing_table[address] = RouteTuple(
+                            destination_address=address,
+                            next_address=last_address,
+                            dist=dist + 1,
+                        )
+                        next_frontier.append(address)
+                frontier = next_frontier
+                dist += 1
+
+        if routing_table != self.routing_table:
+            self.routing_table = routing_table
+            # routes come by increasing distance, the next address of each one is known already
+            self.first_hops = dict()
+            for route in routing_table.values():
+                self.first_hops[route.destination_address] = (
+                    route.next_address
+                    if route.dist == 1
+                    else self.first_hops[route.next_address]
                 )
-                visited[tt.address] = dist + 1
-            dist += 1
 
     def update_mprs(self):
-        # TODO: implement the full selection heuristic
-        self.mprs = set()
-        for n in self.neighbours.values():
-            if self.get_neighbour_type(n.address) == "SYM_NEIGH":
-                self.mprs.add(n.address)
+        """
+        MPR selection heuristic (RFC 3626, 8.3.1): the smallest set of symmetric neighbours,
+        picked greedily, through which all the strict two-hop neighbours are reachable.
+        Neighbours with WILL_ALWAYS are always selected, those with WILL_NEVER never.
+        """
+        symmetric = {
+            address for address, n in self.neighbours.items() if n.status == "sym"
+        }
+        candidates = {
+            address
+            for address in symmetric
+            if self.neighbours[address].willingness != WILL_NEVER
+        }
+        # candidate -> the strict two-hop neighbours reachable through it
+        coverage: dict[NetAddr, set[NetAddr]] = defaultdict(set)
+        for address, two_hop_address in self.two_hop_neighbours:
+            if address in candidates and two_hop_address not in symmetric:
+                coverage[address].add(two_hop_address)
+
+        mprs = {
+            address
+            for address in candidates
+            if self.neighbours[address].willingness == WILL_ALWAYS
+        }
+        uncovered = set().union(*coverage.values())
+        for address in mprs:
+            uncovered -= coverage[address]
+
+        # the neighbours that are the only way to some two-hop neighbour
+        reachable_through: dict[NetAddr, list[NetAddr]] = defaultdict(list)
+        for address, two_hop_addresses in coverage.items():
+            for two_hop_address in two_hop_addresses & uncovered:
+                reachable_through[two_hop_address].append(address)
+        for addresses in reachable_through.values():
+            if len(addresses) == 1:
+                mprs.add(addresses[0])
+        for address in mprs:
+            uncovered -= coverage[address]
+
+        # then by willingness, number of two-hop neighbours still uncovered, and degree
+        while uncovered:
+            best = max(
+                (address for address in coverage if address not in mprs),
+                key=lambda address: (
+                    len(coverage[address] & uncovered) > 0,
+                    self.neighbours[address].willingness,
+                    len(coverage[address] & uncovered),
+                    len(coverage[address]),
+                ),
+            )
+            mprs.add(best)
+            uncovered -= coverage[best]
+
+        changed = self.mprs ^ mprs
+        self.mprs = mprs
+        for address in changed:
+            self.update_link_code(address)
 
     def has_neigbhbours(self) -> bool:
         for n in self.neighbours.values():
@@ -374,9 +507,11 @@ class OLSRRouting(BaseRouting):
         for addr in to_delete:
             del self.links[addr]
             del self.neighbours[addr]
+            self.update_link_code(addr)
             for key in list(self.two_hop_neighbours.keys()):
                 if key[0] == addr:
                     del self.two_hop_neighbours[key]
+            self.neighbourhood_changed = True
 
         to_delete = list()
         for address, selector in self.mpr_selectors.items():
@@ -386,14 +521,46 @@ class OLSRRouting(BaseRouting):
         for address in to_delete:
             del self.mpr_selectors[address]
 
-        self.update_mprs()
-        self.update_routing_table()
+        queue = self.two_hop_queue
+        while queue and queue[0][0] < cur_step:
+            _, key = queue.popleft()
+            two_hop = self.two_hop_neighbours.get(key)
+            # the tuple may have been refreshed since, or removed
+            if two_hop is not None and two_hop.time < cur_step:
+                del self.two_hop_neighbours[key]
+                self.neighbourhood_changed = True
+
+        # the symmetric and asymmetric times of a link are validity times of its hellos
+        queue = self.link_queue
+        while queue and queue[0][0] < cur_step:
+            validity_time, address = queue.popleft()
+            link = self.links.get(address)
+            # the link may have been extended by a later hello since, or removed
+            if link is not None and validity_time in (link.sym_time, link.asym_time):
+                self.update_link_code(address)
+
+        self.expire_duplicates(cur_step)
+
+        # the MPRs depend on the neighbourhood only, the routes on the topology as well
+        if self.neighbourhood_changed:
+            self.update_mprs()
+        if self.neighbourhood_changed or self.topology_changed:
+            self.update_routing_table()
+        self.neighbourhood_changed = False
+        self.topology_changed = False
+        Metrics.instance().mpr_set_sizes[len(self.mprs)] += 1
 
     def routing_control(self, cur_step: int) -> list[Packet]:
         packets = super().routing_control(cur_step)
-        if not packets:
+        # the TC relays held by the broadcast storm suppression come out here
+        forwards = sum(type(packet) is OLSRTopologyControlPacket for packet in packets)
+        if forwards:
+            Metrics.instance().tc_forwards_per_step[cur_step] += forwards
+        # a TC goes with every hello
+        if cur_step % config.HELLO_DELAY != 0:
             return packets
-        tc_packet = OLSRTopologyControlPacket(
+        tc_packet = self.drone.network.pool.acquire(
+            OLSRTopologyControlPacket,
             self.drone.address,
             config.BROADCAST_ADDRESS,
             cur_step,
@@ -402,32 +569,24 @@ class OLSRRouting(BaseRouting):
             list(self.neighbours.keys()),
         )
         packets.append(tc_packet)
+        self.flooding.originated(tc_packet)
         return packets
 
-    def relay_selection(self, packet: Packet) -> NetAddr | None:
-        lookup: dict[NetAddr, list[RouteTuple]] = defaultdict(list)
-        for rt in self.routing_table:
-            lookup[rt.destination_address].append(rt)
-        for routes in lookup.values():
-            routes.sort(key=lambda r: r.dist)
+    def batch_key(self, packet: Packet) -> Hashable:
+        # never send a packet back to the relay it comes from
+        return packet.dst, packet.src_relay
 
-        if packet.dst not in lookup:
+    def relay_selection(self, packet: Packet) -> NetAddr | None:
+        first_hop = self.first_hops.get(packet.dst)
+        if first_hop is None:
             if config.DEBUG:
                 print(f"{self.drone.identifier}\tcannot find destination")
             return None
 
-        next_hop = lookup[packet.dst][0]
-        prev_hop = next_hop
-        while next_hop.dist > 1:
-            prev_hop = next_hop
-            next_hop = lookup[next_hop.next_address][0]
-            if prev_hop.destination_address == next_hop.next_address:
-                return None
-
-        if next_hop.destination_address == packet.src_relay:
+        if first_hop == packet.src_relay:
             return None
 
-        return next_hop.destination_address
+        return first_hop
 
     def make_data_packet(self, event: Event, cur_step: int) -> DataPacket:
         return OLSRDataPacket(
@@ -1,73 +1,147 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+from numpy.random import RandomState
+
+import config
+from entities.packets import Packet
 from routing_algorithms.base import BaseRouting
+from simulation.metrics import Metrics
 from utilities import utilities as util
+from utilities.types import NetAddr
 
 
 class QLearningRouting(BaseRouting):
+    """
+    Q-routing towards the depot. The state is the cell of the drone (see
+    TraversedCells.coord_to_cell), the action the neighbour chosen as relay: the Q-table is a
+    float array with one row per cell and one column per network address (addresses are small
+    integers, the columns grow on demand). The relays of a step are drawn epsilon-greedy for
+    all the packets at once. The actions taken are kept by event until the depot reports that
+    the event was delivered or expired, the reports of a step being applied as one update.
+    Packets to other destinations (the ACKs) go to a random neighbour.
+    """
+
+    batch_routing = False
 
     def __init__(self, drone):
         BaseRouting.__init__(self, drone=drone)
-        self.taken_actions = {}  # id event : (old_state, old_action)
-
-    def feedback(self, drone, id_event, delay, outcome):
+        self.random = RandomState([config.seed, drone.address])
+        self.size_cell = int(config.drone_communication_range * config.CELL_PROB_SIZE_R)
+        n_cells = math.ceil(config.env_width / self.size_cell) * math.ceil(
+            config.env_height / self.size_cell
+        )
+        self.q_table = np.zeros((n_cells, 16))
+        # id event : [(state, action)], the relays chosen for the packets of the event
+        self.taken_actions: dict[int, list[tuple[int, NetAddr]]] = defaultdict(list)
+
+    def feedback(self, outcomes: list[tuple[int, int, int]]):
         """
-        Feedback returned when the packet arrives at the depot or
-        Expire. This function have to be implemented in RL-based protocols ONLY
-        @param drone: The drone that holds the packet
-        @param id_event: The Event id
-        @param delay: packet delay
-        @param outcome: -1 or 1 (read below)
-        @return:
+        Feedback returned by the depot when packets arrive at it or expire.
+        @param outcomes: (id event, delay, outcome) with outcome 1 if a packet of the event
+            has been delivered to the depot and -1 if it expired
         """
-
-        # outcome can be:
-        #   -1 if the packet/event expired;
-        #   1 if the packets has been delivered to the depot
-
-        # Be aware, due to network errors we can give the same event to multiple drones and receive multiple
-        # feedback for the same packet!!
-
-        if id_event in self.taken_actions:
-            # BE AWARE, IMPLEMENT YOUR CODE WITHIN THIS IF CONDITION OTHERWISE IT WON'T WORK!
-            # TIPS: implement here the q-table updating process
-
-            # Drone id and Taken actions
-            # print(
-            #     f"\nIdentifier: {self.drone.identifier}, Taken Actions: {self.taken_actions}, Time Step: {self.simulator.cur_step}"
-            # )
-
-            # feedback from the environment
-            print(drone, id_event, delay, outcome)
-
-            # TODO: write your code here
-
-            state, action = self.taken_actions[id_event]
-
-            # remove the entry, the action has received the feedback
-            del self.taken_actions[id_event]
-
-            # reward or update using the old state and the selected action at that time
-            # do something or train the model (?)
-
-    def relay_selection(self, packet):
+        # due to network errors the same event can be given to multiple drones and
+        # reported multiple times, only the actions taken since the last report are rewarded
+        states, actions, rewards = [], [], []
+        for id_event, delay, outcome in outcomes:
+            taken = self.taken_actions.pop(id_event, None)
+            if taken is None:
+                continue
+            reward = 1 - delay / config.event_duration if outcome == 1 else -1
+            for state, action in taken:
+                states.append(state)
+                actions.append(action)
+                rewards.append(reward)
+        if not states:
+            return
+
+        # each (state, action) moves once, towards the mean of its rewards
+        cells = np.ravel_multi_index((states, actions), self.q_table.shape)
+        cells, inverse, counts = np.unique(
+            cells, return_inverse=True, return_counts=True
+        )
+        targets = np.bincount(inverse, weights=rewards) / counts
+        q_values = self.q_table.reshape(-1)  # a view, the table is contiguous
+        q_values[cells] += config.QL_LEARNING_RATE * (targets - q_values[cells])
+
+    def state(self) -> int:
+        """the cell of the drone"""
+        x = min(max(self.drone.coords[0], 0), config.env_width - 1)
+        y = min(max(self.drone.coords[1], 0), config.env_height - 1)
+        cell, _ = util.TraversedCells.coord_to_cell(
+            self.size_cell, config.env_width, x, y
+        )
+        return int(cell)
+
+    def relay_selection(self, packet: Packet) -> NetAddr | None:
         """
         This function returns the best relay to send packets.
-        @param packet:
-        @param opt_neighbors: a list of tuple (hello_packet, source_drone)
-        @return: The best drone to use as relay
+        @return: The best drone to use as relay or None if no relay is selected
         """
-        # TODO: Implement your code HERE
-
-        # Only if you need!
-        # cell_index = util.TraversedCells.coord_to_cell(size_cell=self.simulator.prob_size_cell,
-        #                                                width_area=self.simulator.env_width,
-        #                                                x_pos=self.drone.coords[0],  # e.g. 1500
-        #                                                y_pos=self.drone.coords[1])[0]  # e.g. 500
-        # print(cell_index)
-        state, action = None, None
-
-        # print(self.drone.identifier)
-
-        # Store your current action --- you can add some stuff if needed to take a reward later
-        self.taken_actions[packet.event_ref.identifier] = (state, action)
-
-        return None  # here you should return a drone object!
+        return self.select_relays([packet])[0]
+
+    def route_packets(self, packets: list[Packet]) -> list[Packet]:
+        Metrics.instance().mean_numbers_of_possible_relays.extend(
+            [len(self.neighbours)] * len(packets)
+        )
+        return [
+            self.assign_relay(packet, relay)
+            for packet, relay in zip(packets, self.select_relays(packets))
+            if relay is not None
+        ]
+
+    def select_relays(self, packets: list[Packet]) -> list[NetAddr | None]:
+        """
+        Epsilon-greedy relays of the packets to the depot: with probability QL_EPSILON a
+        packet explores a random neighbour, otherwise it takes the neighbour with the best
+        Q-value in the current cell, ties broken at random. A packet never goes back to the
+        neighbour it comes from.
+        @return: the relay of each packet, None if there is none
+        """
+        relays: list[NetAddr | None] = [None] * len(packets)
+        learnt = []  # indices of the packets routed by the Q-table
+        for i, packet in enumerate(packets):
+            if packet.dst in self.neighbours:
+                relays[i] = packet.dst
+            elif packet.dst != config.DEPOT_ADDRESS:
+                relays[i] = int(self.random.choice(self.neighbours.addresses()))
+            else:
+                learnt.append(i)
+        if not learnt:
+            return relays
+
+        addresses = self.neighbours.addresses()
+        if addresses.max() >= self.q_table.shape[1]:
+            self._grow(addresses.max() + 1)
+        state = self.state()
+        q_values = self.q_table[state, addresses]
+        src_relays = np.array([packets[i].src_relay for i in learnt])
+        allowed = addresses[None, :] != src_relays[:, None]  # packets x neighbours
+
+        scores = np.where(allowed, self.random.rand(*allowed.shape), -1)
+        masked = np.where(allowed, q_values, -np.inf)
+        best = masked == masked.max(axis=1, keepdims=True)
+        greedy = np.where(best & allowed, scores, -1).argmax(axis=1)
+        explore = self.random.rand(len(learnt)) < config.QL_EPSILON
+        choices = addresses[np.where(explore, scores.argmax(axis=1), greedy)]
+
+        for i, relay, any_allowed in zip(learnt, choices, allowed.any(axis=1)):
+            if not any_allowed:
+                continue
+            relays[i] = int(relay)
+            self.taken_actions[packets[i].event_ref.identifier].append(
+                (state, int(relay))
+            )
+        return relays
+
+    def should_forward(self, packet: Packet) -> bool:
+        # relays do not keep the packets, the hop limit ends the routing loops
+        packet.hop_count += 1
+        return packet.hop_count < packet.ttl and not packet.is_expired(self.drone.time)
+
+    def _grow(self, size: int):
+        grown = np.zeros((len(self.q_table), max(size, 2 * self.q_table.shape[1])))
+        grown[:, : self.q_table.shape[1]] = self.q_table
+        self.q_table = grown
@@ -5,6 +5,7 @@ from routing_algorithms.base import BaseRouting
 
 
 class RandomRouting(BaseRouting):
+    batch_routing = False
 
     def __init__(self, drone):
         BaseRouting.__init__(self, drone)
@@ -17,4 +18,4 @@ class RandomRouting(BaseRouting):
         @param opt_neighbors: a list of tuples (hello_packet, drone)
         @return: a random drone as relay
         """
-        return self.random.choice(list(self.neighbours.values()))
+        return int(self.random.choice(self.neighbours.addresses()))
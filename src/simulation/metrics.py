@@ -8,6 +8,7 @@ import pandas as pd
 import seaborn as sb
 
 import config
+from simulation.packet_table import PacketTable
 
 """ Metrics class keeps track of all the metrics during all the simulation. """
 
@@ -32,6 +33,34 @@ class Metrics:
         self.all_data_packets_in_simulation = 0
         self.control_packets_distribution = defaultdict(int)
 
+        # number of packets dropped from the drones buffers because expired, per time step
+        self.expired_packets_per_step = defaultdict(int)
+
+        # control packets allocated / recycled by the PacketPool, per packet type
+        self.packet_pool = {}
+
+        # garbage collections run during the simulation, per generation
+        self.gc_collections = {}
+
+        # AODV route discoveries started, and RREQs sent (originated or forwarded) for them
+        self.route_discoveries = 0
+        self.rreq_transmissions = 0
+        self.given_up_discoveries = 0
+        # AODV local repairs started, and those that ended in a route error
+        self.local_repairs = 0
+        self.failed_local_repairs = 0
+
+        # floods started, and first receptions of them, per packet type
+        self.floods = defaultdict(int)
+        self.flood_receptions = defaultdict(int)
+        # relays of the floods sent, and given up by the broadcast storm suppression
+        self.rebroadcasts = defaultdict(int)
+        self.suppressed_rebroadcasts = defaultdict(int)
+
+        # OLSR: MPR set size -> number of (router, step) with it, and TC relays per step
+        self.mpr_set_sizes = defaultdict(int)
+        self.tc_forwards_per_step = defaultdict(int)
+
         # all the events generated during the simulation
         self.events = set()
 
@@ -75,6 +104,27 @@ class Metrics:
         self.number_of_packets_to_depot = len(
             self.drones_packets_to_depot
         )  # may contain duplicates
+        self.number_of_expired_packets = sum(self.expired_packets_per_step.values())
+        self.rreq_per_discovery = (
+            self.rreq_transmissions / self.route_discoveries
+            if self.route_discoveries
+            else 0
+        )
+        self.mean_mpr_set_size = (
+            sum(size * count for size, count in self.mpr_set_sizes.items())
+            / sum(self.mpr_set_sizes.values())
+            if self.mpr_set_sizes
+            else 0
+        )
+        self.mean_tc_forwards_per_step = (
+            sum(self.tc_forwards_per_step.values())
+            / self.mission_setup["len_simulation"]
+        )
+        # the mean number of routers reached by a flood, what the suppression costs in coverage
+        self.flood_reach = {
+            name: self.flood_receptions[name] / floods
+            for name, floods in self.floods.items()
+        }
 
         # NOTE: THE DEPOT PACKETS ARE NOT COUNTED, WE ADD THEM HERE!!
         # self.all_data_packets_in_simulation += len(self.drones_packets_to_depot)
@@ -140,7 +190,39 @@ class Metrics:
             self.all_data_packets_in_simulation,
         )
         print("Number of packets to depot: ", len(self.drones_packets))
+        print("Number of expired packets: ", self.number_of_expired_packets)
         print("Packet mean delivery time (seconds): ", self.packet_mean_delivery_time)
+        if PacketTable.instance().enabled:
+            print("Packet table: ", PacketTable.instance().summary())
+        print("Packet pool: ", self.packet_pool)
+        if self.route_discoveries:
+            print(
+                "Route discoveries: ",
+                self.route_discoveries,
+                "RREQ transmissions per discovery: ",
+                self.rreq_per_discovery,
+                "given up: ",
+                self.given_up_discoveries,
+            )
+        if self.local_repairs:
+            print(
+                "Local repairs: ",
+                self.local_repairs,
+                "failed: ",
+                self.failed_local_repairs,
+            )
+        if self.floods:
+            print("Flood relays sent: ", dict(self.rebroadcasts))
+            print("Flood relays suppressed: ", dict(self.suppressed_rebroadcasts))
+            print("Routers reached per flood: ", self.flood_reach)
+        if self.mpr_set_sizes:
+            print(
+                "Mean MPR set size: ",
+                self.mean_mpr_set_size,
+                "TC forwards per step: ",
+                self.mean_tc_forwards_per_step,
+            )
+        print("Garbage collections per generation: ", self.gc_collections)
         print(
             "Packet delivery ratio: ",
             self.number_of_events_to_depot / self.all_data_packets_in_simulation,
@@ -166,6 +248,7 @@ class Metrics:
             "data_packets_count": self.all_data_packets_in_simulation,
             "pdr": self.number_of_events_to_depot / self.all_data_packets_in_simulation,
             "mean_delivery_time": self.packet_mean_delivery_time,
+            "expired_packets_count": self.number_of_expired_packets,
         }
 
     def __dictionary_represenation(self):
@@ -187,6 +270,21 @@ class Metrics:
         out_results["packet_mean_delivery_time"] = self.packet_mean_delivery_time
         out_results["event_mean_delivery_time"] = self.event_mean_delivery_time
         out_results["time_on_mission"] = self.time_on_mission
+        out_results["number_of_expired_packets"] = self.number_of_expired_packets
+        out_results["expired_packets_per_step"] = dict(self.expired_packets_per_step)
+        out_results["packet_pool"] = self.packet_pool
+        out_results["route_discoveries"] = self.route_discoveries
+        out_results["rreq_transmissions"] = self.rreq_transmissions
+        out_results["rreq_per_discovery"] = self.rreq_per_discovery
+        out_results["given_up_discoveries"] = self.given_up_discoveries
+        out_results["local_repairs"] = self.local_repairs
+        out_results["failed_local_repairs"] = self.failed_local_repairs
+        out_results["rebroadcasts"] = dict(self.rebroadcasts)
+        out_results["suppressed_rebroadcasts"] = dict(self.suppressed_rebroadcasts)
+        out_results["flood_reach"] = self.flood_reach
+        out_results["mean_mpr_set_size"] = self.mean_mpr_set_size
+        out_results["mean_tc_forwards_per_step"] = self.mean_tc_forwards_per_step
+        out_results["gc_collections"] = self.gc_collections
         out_results["packet_delivery_ratio"] = (
             self.number_of_packets_to_depot / self.all_data_packets_in_simulation
         )
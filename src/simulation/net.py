@@ -6,8 +6,10 @@ from scipy.stats import norm
 import config
 import utilities.utilities as util
 from entities.packets import Packet
-from entities.packets.base import DataPacket
+from entities.packets.base import DataPacket, HelloPacket
 from simulation.metrics import Metrics
+from simulation.packet_pool import PacketPool
+from simulation.packet_table import PacketTable
 from utilities.types import NetAddr, Point
 
 
@@ -15,19 +17,61 @@ class MediumDispatcher:
 
     def __init__(self):
         self.packets: list[tuple[Packet, Point, int]] = []
+        # hello packets set apart for the oracle neighbour discovery
+        self.hellos: list[tuple[HelloPacket, Point, int]] = []
         self.metric_class = Metrics.instance()
         self.random = np.random.RandomState(config.seed)
+        self.pool = PacketPool()
         if config.communication_error_type == config.ChannelError.GAUSSIAN:
             self.buckets_probability = self.__init_guassian()
 
     def send(self, packet: Packet, pos: Point, communication_range: int):
         if packet.src == packet.dst_relay:
             return
-        self.packets.append((packet, pos, communication_range))
-        if not isinstance(packet, DataPacket):
+        if config.ORACLE_NEIGHBOURS and type(packet) is HelloPacket:
+            self.hellos.append((packet, pos, communication_range))
+        else:
+            self.packets.append((packet, pos, communication_range))
+        if isinstance(packet, DataPacket):
+            PacketTable.instance().hop(packet.table_index)
+        else:
             self.metric_class.all_control_packets_in_simulation += 1
             self.metric_class.control_packets_distribution[type(packet)] += 1
 
+    def clear(self):
+        """end of the send/listen cycle: drop the sent packets, recycling the pooled ones"""
+        for packet, _, _ in self.packets + self.hellos:
+            self.pool.release(packet)
+        self.packets = []
+        self.hellos = []
+
+    def deliver_hellos(self, entities: list):
+        """
+        Oracle neighbour discovery: hand the hello packets sent in the last step to the routers
+        of the entities in range, as listen would, without copying them nor going through the
+        generic packet processing. The geometry of all the (receiver, hello) pairs is evaluated
+        in one pass.
+        @param entities: the receiving entities, in the order they listen
+        """
+        if not self.hellos:
+            return
+        senders = np.array([packet.src for packet, _, _ in self.hellos])
+        sender_pos = np.array([pos for _, pos, _ in self.hellos], dtype=float)
+        sender_range = np.array([comm_range for _, _, comm_range in self.hellos])
+        receiver_pos = np.array([entity.coords for entity in entities], dtype=float)
+        receiver_range = np.array([entity.communication_range for entity in entities])
+        receivers = np.array([entity.address for entity in entities])
+
+        offsets = receiver_pos[:, None, :] - sender_pos[None, :, :]
+        distances = np.hypot(offsets[..., 0], offsets[..., 1])
+        in_range = (distances <= np.maximum.outer(receiver_range, sender_range)) & (
+            receivers[:, None] != senders[None, :]
+        )
+        for receiver, hello in zip(*np.nonzero(in_range)):
+            # listen never applies the channel errors either
+            if self.channel_success(distances[receiver, hello], no_error=True):
+                entities[receiver].router.process_hello(self.hellos[hello][0])
+
     def channel_success(self, drones_distance, no_error=False) -> bool:
         """
         Precondition: two drones are close enough to communicate. Return true if the communication
@@ -70,7 +114,10 @@ class MediumDispatcher:
             if not self.channel_success(distance, no_error=True):
                 continue
 
-            packets_to_send.append(copy.deepcopy(packet))
+            received = copy.deepcopy(packet)
+            received.pooled = False  # the receiver owns its copy
+            received.rx_distance = distance
+            packets_to_send.append(received)
 
         return packets_to_send
 
@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+import config
+from entities.packets import Packet
+
+""" PacketPool recycles the short-lived control packets (hello, TC, ...). """
+
+
+class PacketPool:
+    """
+    Per-type free lists of control packets, owned by the MediumDispatcher.
+    Routers acquire the control packets they broadcast from the pool; once the send/listen
+    cycle is over (receivers only keep deep copies), the dispatcher releases them and the
+    next acquire of the same type re-initialises a released packet instead of allocating.
+    Only packets that nobody keeps after sending must be acquired: ACKs stay in the buffer
+    of their sender and are not pooled.
+    """
+
+    def __init__(self, enabled: bool | None = None):
+        self.enabled = config.ENABLE_PACKET_POOL if enabled is None else enabled
+        self.free: dict[type, list[Packet]] = defaultdict(list)
+        self.allocated: dict[str, int] = defaultdict(int)
+        self.recycled: dict[str, int] = defaultdict(int)
+
+    def acquire(self, packet_type: type, *args, **kwargs) -> Packet:
+        """return a packet of the given type, built with the given arguments"""
+        free = self.free[packet_type]
+        if free:
+            packet = free.pop()
+            packet.__init__(*args, **kwargs)
+            self.recycled[packet_type.__name__] += 1
+        else:
+            packet = packet_type(*args, **kwargs)
+            self.allocated[packet_type.__name__] += 1
+        packet.pooled = self.enabled
+        return packet
+
+    def release(self, packet: Packet):
+        """give back a packet to the pool, packets not acquired from the pool are ignored"""
+        if not packet.pooled:
+            return
+        packet.pooled = False
+        self.free[type(packet)].append(packet)
+
+    def stats(self) -> dict:
+        return {
+            "allocated": dict(self.allocated),
+            "recycled": dict(self.recycled),
+        }
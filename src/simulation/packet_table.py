@@ -0,0 +1,116 @@
+import itertools
+
+import numpy as np
+
+import config
+
+""" PacketTable keeps the per-simulation registry of packets and events. """
+
+
+class PacketTable:
+    """
+    Allocates monotonic identifiers to packets and events: id(self) values are reused by
+    CPython once objects are garbage collected, which breaks deduplication and ACK matching
+    in long runs.
+    When config.ENABLE_PACKET_TABLE is set, it also stores the data packets column-wise
+    (struct of arrays): every data packet references its row through table_index, so that
+    delivery and expiry bookkeeping are array operations.
+    """
+
+    GENERATED = 0
+    DELIVERED = 1
+    EXPIRED = 2
+
+    COLUMNS = {
+        "src": np.int32,
+        "dst": np.int32,
+        "timestamp": np.int64,
+        "deadline": np.int64,
+        "hops": np.int32,
+        "state": np.int8,
+    }
+
+    _instance = None
+
+    @classmethod
+    def instance(cls) -> "PacketTable":
+        if cls._instance is None:
+            cls._instance = PacketTable()
+        return cls._instance
+
+    def __init__(self, capacity: int = 1024, enabled: bool | None = None):
+        self.ids = itertools.count(1)
+        self._enabled = enabled
+        self.size = 0
+        self.src = np.zeros(capacity, dtype=np.int32)
+        self.dst = np.zeros(capacity, dtype=np.int32)
+        self.timestamp = np.zeros(capacity, dtype=np.int64)
+        self.deadline = np.zeros(capacity, dtype=np.int64)
+        self.hops = np.zeros(capacity, dtype=np.int32)
+        self.state = np.zeros(capacity, dtype=np.int8)
+
+    @property
+    def enabled(self) -> bool:
+        # read lazily: the table can be created while config is still being imported
+        if self._enabled is None:
+            return config.ENABLE_PACKET_TABLE
+        return self._enabled
+
+    def next_id(self) -> int:
+        return next(self.ids)
+
+    def add(self, packet) -> int:
+        """store a data packet, return its row or -1 if the table is disabled"""
+        if not self.enabled:
+            return -1
+        if self.size == len(self.src):
+            self.__grow()
+
+        row = self.size
+        self.src[row] = packet.src
+        self.dst[row] = packet.dst
+        self.timestamp[row] = packet.timestamp
+        self.deadline[row] = packet.deadline
+        self.hops[row] = 0
+        self.state[row] = PacketTable.GENERATED
+        self.size += 1
+        return row
+
+    def __grow(self):
+        for name, dtype in PacketTable.COLUMNS.items():
+            old = getattr(self, name)
+            new = np.zeros(2 * len(old), dtype=dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def hop(self, row: int):
+        """the packet has been transmitted once more"""
+        if row >= 0:
+            self.hops[row] += 1
+
+    def delivered(self, row: int):
+        if row >= 0:
+            self.state[row] = PacketTable.DELIVERED
+
+    def expired(self, row: int):
+        if row >= 0 and self.state[row] == PacketTable.GENERATED:
+            self.state[row] = PacketTable.EXPIRED
+
+    def column(self, name: str) -> np.ndarray:
+        """the filled part of a column"""
+        return getattr(self, name)[: self.size]
+
+    def summary(self) -> dict:
+        states = np.bincount(self.column("state"), minlength=3)
+        delivered = self.column("state") == PacketTable.DELIVERED
+        return {
+            "packets": self.size,
+            "delivered": int(states[PacketTable.DELIVERED]),
+            "expired": int(states[PacketTable.EXPIRED]),
+            "in_flight": int(states[PacketTable.GENERATED]),
+            "mean_hops_delivered": (
+                float(self.column("hops")[delivered].mean())
+                if delivered.any()
+                else float("nan")
+            ),
+        }
@@ -1,3 +1,4 @@
+import gc
 import logging
 import math
 import time
@@ -16,6 +17,7 @@ from entities.drone import Drone
 from entities.environment import Environment
 from simulation.metrics import Metrics
 from simulation.net import MediumDispatcher
+from simulation.packet_table import PacketTable
 from utilities import utilities
 from utilities.types import Point
 
@@ -91,6 +93,9 @@ class Simulator:
         # Setup vari
         # for stats
         self.metrics = Metrics.instance()
+        # identifiers restart from 1 in every simulation
+        PacketTable._instance = None
+        self.packet_table = PacketTable.instance()
 
         # setup network
         self.__setup_net_dispatcher()
@@ -301,6 +306,7 @@ class Simulator:
 
         start = datetime.now()
         # logger.setLevel(logging.INFO)
+        gc_collections = [stats["collections"] for stats in gc.get_stats()]
 
         def log_elapsed(_name):
             nonlocal start
@@ -319,7 +325,9 @@ class Simulator:
             # )
             self.apply_for_each_drone(Drone.listen)
             self.depot.listen()
-            self.network_dispatcher.packets = []
+            if config.ORACLE_NEIGHBOURS:
+                self.network_dispatcher.deliver_hellos(self.drones + [self.depot])
+            self.network_dispatcher.clear()
 
             self.apply_for_each_drone(Drone.update_packets)
 
@@ -328,7 +336,7 @@ class Simulator:
 
             self.apply_for_each_drone(Drone.send_packets)
             self.depot.send_packets()
-            self.depot.buffer = []
+            self.depot.buffer.clear()
 
             self.apply_for_each_drone(Drone.move, self.time_step_duration)
 
@@ -352,6 +360,12 @@ class Simulator:
                 log_elapsed(f"step {cur_step}")
             start = datetime.now()
 
+        self.metrics.gc_collections = {
+            generation: stats["collections"] - gc_collections[generation]
+            for generation, stats in enumerate(gc.get_stats())
+        }
+        self.metrics.packet_pool = self.network_dispatcher.pool.stats()
+
         if config.DEBUG:
             print(
                 "End of simulation, sim time: "
@@ -367,6 +381,7 @@ class Simulator:
         self.print_metrics(plot_id="final")
         self.save_metrics(config.ROOT_EVALUATION_DATA + self.simulation_name)
         Metrics._instance = None
+        PacketTable._instance = None
 
     def print_metrics(self, plot_id="final"):
         """add signature"""
@@ -1,6 +1,7 @@
 import json
 import math
 import random
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -110,21 +111,150 @@ def get_tour(
     return tour
 
 
+def get_tours(
+    ndrones,
+    autonomy,
+    edge_area,
+    depot_pos,
+    random_generator,
+    range_decision=None,
+    random_starting_point=True,
+):
+    """Batched version of get_tour: build the tours of ndrones drones at once.
+    At every iteration the next waypoint of all the drones still flying is sampled with
+    vectorized operations, following the same rules of get_tour and next_target.
+    return a dictionary {drone_id : list of waypoint}
+    """
+    if range_decision is None:
+        range_decision = config.RANDOM_STEPS
+
+    steps = np.asarray(range_decision)
+    min_step = steps.min() * 1.44
+    depot = np.asarray(depot_pos)
+    if random_starting_point:
+        start = random_generator.randint(0, edge_area, size=(ndrones, 2))
+    else:
+        start = np.tile(depot, (ndrones, 1))
+
+    current = start.copy()
+    residual = np.full(ndrones, float(autonomy))
+    active = np.ones(ndrones, dtype=bool)
+    visited_drones, visited_points = [], []
+    while active.any():
+        idx = np.flatnonzero(active)
+        cur = current[idx]
+        res = residual[idx]
+        to_depot = np.linalg.norm(cur - depot, axis=1)
+
+        # get_tour loop condition, next_target going back to the depot
+        feasible = steps * 1.44 * 2 + to_depot[:, None] <= res[:, None]
+        go_on = (
+            (res >= min_step + np.linalg.norm(cur - start[idx], axis=1))
+            & (res >= min_step + to_depot)
+            & feasible.any(axis=1)
+        )
+        active[idx[~go_on]] = False
+        idx, cur, res, feasible = idx[go_on], cur[go_on], res[go_on], feasible[go_on]
+        if len(idx) == 0:
+            break
+
+        # uniform choice among the feasible step lengths of each drone
+        pick = (random_generator.rand(len(idx)) * feasible.sum(axis=1)).astype(int)
+        d = steps[np.argmax(np.cumsum(feasible, axis=1) > pick[:, None], axis=1)]
+        low = np.maximum(0, cur - d[:, None])
+        high = np.minimum(cur + d[:, None], edge_area)
+        next_p = random_generator.randint(low, high)
+
+        at_depot = (next_p == depot).all(axis=1)
+        active[idx[at_depot]] = False
+        idx, cur, res, next_p = (
+            idx[~at_depot],
+            cur[~at_depot],
+            res[~at_depot],
+            next_p[~at_depot],
+        )
+        visited_drones.append(idx)
+        visited_points.append(cur)
+        residual[idx] = res - np.linalg.norm(cur - next_p, axis=1)
+        current[idx] = next_p
+
+    drones = np.concatenate(visited_drones) if visited_drones else np.zeros(0, int)
+    points = np.concatenate(visited_points) if visited_points else np.zeros((0, 2))
+    order = np.argsort(drones, kind="stable")
+    per_drone = np.split(
+        points[order], np.cumsum(np.bincount(drones, minlength=ndrones))[:-1]
+    )
+    tours = {}
+    for d in range(ndrones):
+        tour = list(map(tuple, per_drone[d].tolist()))
+        if (current[d] != depot).any():  # assert last point is the depot (closed tour)
+            tour.append(tuple(depot_pos))
+        tours[d] = tour
+    return tours
+
+
 def random_waypoint_tour(
     ndrones, nrounds, depot, autonomy, edge_area, random_generator
 ):
-    drones_tours = {}
-    for d in range(ndrones):
-        print(d)
-        d_tours = []
-        for r in range(nrounds):
-            d_tours.append(
-                get_tour(autonomy, edge_area, depot, random_generator=random_generator)
-            )
-        drones_tours[d] = d_tours
+    drones_tours = {d: [] for d in range(ndrones)}
+    for r in range(nrounds):
+        for d, tour in get_tours(
+            ndrones, autonomy, edge_area, depot, random_generator=random_generator
+        ).items():
+            drones_tours[d].append(tour)
     return drones_tours
 
 
+def tour_library_file(
+    seed, ndrones, nrounds, autonomy, edge_area, depot, out_file_format
+):
+    """build the tours of ndrones drones for nrounds rounds with the given seed,
+    and save them in the binary tour format. Rounds are appended one after the other.
+    """
+    # imported here: utilities.utilities imports this module
+    from utilities.utilities import paths_to_npz
+
+    random_generator = np.random.RandomState(seed)
+    tours = {d: [] for d in range(ndrones)}
+    for _ in range(nrounds):
+        for d, tour in get_tours(
+            ndrones, autonomy, edge_area, depot, random_generator
+        ).items():
+            tours[d].extend(tour)
+
+    out_file = out_file_format.format(seed)
+    paths_to_npz(tours, out_file)
+    return out_file
+
+
+def tour_library(
+    seeds,
+    ndrones,
+    nrounds,
+    autonomy,
+    edge_area,
+    depot,
+    out_file_format="data/tours/RANDOM_missions{}.npz",
+    processes=None,
+):
+    """build one binary tour file per seed, seeds are spread over a pool of processes"""
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(
+                tour_library_file,
+                seed,
+                ndrones,
+                nrounds,
+                autonomy,
+                edge_area,
+                depot,
+                out_file_format,
+            )
+            for seed in seeds
+        ]
+        return [future.result() for future in futures]
+
+
 ## -----------------------------------------------------------------------------
 #  _____   _       ____  _______             _____      __      __ ______
 # |  __ \ | |     / __ \|__   __|   ___     / ____|   /\\ \    / /|  ____|
@@ -207,30 +337,14 @@ def run(
         to_json(tours, mission_data, seed)
 
 
-"build the json file tours for the routing "
+"build the binary tour files for the routing "
 if __name__ == "__main__":
 
-    for seed in range(0, 50):
-        # mission info
-        depot = (750, 0)
-        nrounds = 1
-        edge_area = 1500
-        aut = 100000  # meters in our simulation use at least 60000
-        ndrones = 90
-        mission_data = {
-            "ndrones": str(ndrones),
-            "autonomy_meters": str(aut),
-            "edge_area": str(edge_area),
-        }
-        # save = True -> create the json file with the path
-        run(
-            ndrones,
-            nrounds,
-            aut,
-            depot,
-            mission_data,
-            edge_area,
-            seed,
-            plot=False,
-            save=True,
-        )
+    # mission info
+    depot = (750, 0)
+    nrounds = 1
+    edge_area = 1500
+    aut = 100000  # meters in our simulation use at least 60000
+    ndrones = 90
+
+    tour_library(range(0, 50), ndrones, nrounds, aut, edge_area, depot)
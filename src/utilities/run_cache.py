@@ -0,0 +1,159 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pathlib
+import types
+
+import config
+from utilities.utilities import make_path
+
+"""
+Content-addressed cache of simulation results.
+
+Every run is identified by a hash of its effective configuration: all the Simulator
+parameters, the constants of config.py that influence the simulation, the digest of the
+tour file and the version of the code. Campaign runners (main.run_experiments and
+experiments.experiment_ndrones) look the key up before running, so resuming an interrupted
+campaign only executes the missing runs.
+"""
+
+logger = logging.getLogger(__name__)
+
+# config attributes that do not change the outcome of a simulation
+IGNORED_CONFIG_KEYS = {
+    "DEBUG",
+    "EXPERIMENTS_DIR",
+    "ROOT_EVALUATION_DATA",
+    "RUN_CACHE_DIR",
+    "NN_MODEL_PATH",
+    "show_plot",
+    "WAIT_SIM_STEP",
+    "SKIP_SIM_STEP",
+    "DRAW_SIZE",
+    "IS_SHOW_NEXT_TARGET_VEC",
+    "SAVE_PLOT",
+    "SAVE_PLOT_DIR",
+}
+
+BASE_PATH = os.path.join(os.path.dirname(__file__), "../..")
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), "..")
+
+
+def config_snapshot() -> dict:
+    """return the constants of config.py that affect the outcome of a simulation"""
+    snapshot = {}
+    for name, value in vars(config).items():
+        if name.startswith("_") or name in IGNORED_CONFIG_KEYS:
+            continue
+        if isinstance(value, (types.ModuleType, type, types.FunctionType)):
+            continue
+        snapshot[name] = value
+    return snapshot
+
+
+def file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as in_file:
+        for chunk in iter(lambda: in_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tour_digest(seed: int) -> str | None:
+    """digest of the tour file used by the drones, None if tours are generated online"""
+    if not config.PATH_FROM_JSON:
+        return None
+    tour_file = os.path.join(BASE_PATH, config.JSONS_PATH_PREFIX.format(seed))
+    if not os.path.exists(tour_file):
+        return None
+    return file_digest(tour_file)
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """digest of all the python sources of the simulator"""
+    digest = hashlib.sha256()
+    root = pathlib.Path(SOURCE_PATH).resolve()
+    for source in sorted(root.rglob("*.py")):
+        digest.update(str(source.relative_to(root)).encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def run_key(**simulator_kwargs) -> str:
+    """
+    Hash of the effective configuration of a run.
+    @param simulator_kwargs: the keyword arguments the Simulator is built with,
+        missing parameters take the Simulator defaults
+    @return: the hex digest identifying the run
+    """
+    # imported here to avoid pulling pygame & co. when only hashing is needed
+    from simulation.simulator import Simulator
+
+    bound = inspect.signature(Simulator).bind(**simulator_kwargs)
+    bound.apply_defaults()
+    effective = {
+        "simulator": bound.arguments,
+        "config": config_snapshot(),
+        "tours": tour_digest(bound.arguments["seed"]),
+        "code": code_version(),
+    }
+    encoded = json.dumps(effective, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class RunCache:
+    """Results store indexed by run key, one json file per run."""
+
+    def __init__(self, directory: str = config.RUN_CACHE_DIR, force: bool = False):
+        """
+        directory : where the results are stored
+        force : if True the cache is never hit, runs are always executed (and stored again)
+        """
+        self.directory = directory
+        self.force = force
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def __contains__(self, key: str) -> bool:
+        return not self.force and os.path.exists(self.path(key))
+
+    def load(self, key: str) -> dict:
+        with open(self.path(key), "r") as in_file:
+            return json.load(in_file)
+
+    def store(self, key: str, results: dict):
+        """store the results of a run, written atomically so that a crash never leaves partial files"""
+        file_path = self.path(key)
+        make_path(file_path)
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "w") as out_file:
+            json.dump(results, out_file, default=str)
+        os.replace(tmp_path, file_path)
+
+
+def cached_run(cache: RunCache, **simulator_kwargs) -> dict:
+    """
+    Run a simulation, unless its results are already in the cache.
+    @param cache: the results store
+    @param simulator_kwargs: the keyword arguments the Simulator is built with
+    @return: the results of the run (Metrics.dict_rep)
+    """
+    from simulation.simulator import Simulator
+
+    key = run_key(**simulator_kwargs)
+    if key in cache:
+        logger.info(f"Skipping cached run {key}")
+        return cache.load(key)
+
+    sim = Simulator(**simulator_kwargs)
+    logger.info("Running the simulation")
+    sim.run()  # run the simulation
+    sim.close()
+    results = sim.metrics.dict_rep()
+    cache.store(key, results)
+    return results
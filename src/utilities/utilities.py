@@ -1,8 +1,10 @@
+import functools
 import json
 import os
 import pathlib
 import pickle
 import time
+import zipfile
 from ast import literal_eval as make_tuple
 
 import matplotlib.pyplot as plt
@@ -106,7 +108,7 @@ class PathManager:
         self.path_from_json = path_from_json
         self.json_file = json_file.format(seed)
         if path_from_json:
-            self.path_dict = json_to_paths(self.json_file)
+            self.path_dict = load_paths(self.json_file)
             self.rnd_paths = None
         else:
             self.path_dict = None
@@ -222,6 +224,97 @@ def json_to_paths(json_file_path) -> dict[int, Path]:
     return out_data
 
 
+# ------------------ Binary tours ----------------------
+# A tour file (.npz, uncompressed) holds three arrays:
+#   - indices: int64 (n_drones,), the drone ids
+#   - offsets: int64 (n_drones + 1,), the tour of indices[i] is waypoints[offsets[i]:offsets[i + 1]]
+#   - waypoints: float32 (n_waypoints, 2), all the tours one after the other
+
+
+def paths_to_npz(paths: dict[int, Path], npz_file_path: str):
+    """save the tours {drone_id : list of waypoint} in the binary tour format"""
+    indices = np.array(sorted(paths.keys()), dtype=np.int64)
+    lengths = [len(paths[i]) for i in indices]
+    offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    waypoints = np.array(
+        [waypoint for i in indices for waypoint in paths[i]], dtype=np.float32
+    ).reshape(-1, 2)
+    make_path(npz_file_path)
+    # not compressed: the members must stay contiguous on disk to be memory mapped
+    np.savez(npz_file_path, indices=indices, offsets=offsets, waypoints=waypoints)
+
+
+def json_to_npz(json_file_path: str, npz_file_path: str | None = None) -> str:
+    """convert a json tour file into the binary tour format, return the path of the new file"""
+    if npz_file_path is None:
+        npz_file_path = os.path.splitext(json_file_path)[0] + ".npz"
+    base_path = os.path.join(os.path.dirname(__file__), "../..")
+    paths_to_npz(json_to_paths(json_file_path), os.path.join(base_path, npz_file_path))
+    return npz_file_path
+
+
+def _memmap_npz_member(npz_file_path: str, member: str) -> np.ndarray:
+    """memory map an array stored (not compressed) in a npz file"""
+    with zipfile.ZipFile(npz_file_path) as archive:
+        info = archive.getinfo(member + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return np.load(npz_file_path)[member]
+
+    with open(npz_file_path, "rb") as in_file:
+        # local file header: 30 bytes + file name + extra field
+        in_file.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(in_file.read(4), dtype="<u2")
+        in_file.seek(info.header_offset + 30 + name_length + extra_length)
+        if np.lib.format.read_magic(in_file) == (1, 0):
+            header = np.lib.format.read_array_header_1_0(in_file)
+        else:
+            header = np.lib.format.read_array_header_2_0(in_file)
+        shape, fortran_order, dtype = header
+        offset = in_file.tell()
+    return np.memmap(
+        npz_file_path,
+        dtype=dtype,
+        mode="r",
+        offset=offset,
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
+
+
+def npz_to_paths(npz_file_path: str) -> dict[int, Path]:
+    """load the tours from a file in the binary tour format
+    and return a dictionary {drone_id : list of waypoint}
+    """
+    base_path = os.path.join(os.path.dirname(__file__), "../..")
+    npz_file_path = os.path.join(base_path, npz_file_path)
+    indices = _memmap_npz_member(npz_file_path, "indices")
+    offsets = _memmap_npz_member(npz_file_path, "offsets")
+    waypoints = _memmap_npz_member(npz_file_path, "waypoints")
+    return {
+        int(drone_index): list(map(tuple, waypoints[start:end].tolist()))
+        for drone_index, start, end in zip(indices, offsets[:-1], offsets[1:])
+    }
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_paths(file_path: str, mtime: float) -> dict[int, Path]:
+    if file_path.endswith(".npz"):
+        return npz_to_paths(file_path)
+    return json_to_paths(file_path)
+
+
+def load_paths(file_path: str) -> dict[int, Path]:
+    """load the tours from a json or binary (.npz) tour file.
+    Tours are cached in memory by file and modification time, so that the
+    simulations of a campaign read and parse every file once.
+    The returned tours are shared, they must not be modified.
+    """
+    base_path = os.path.join(os.path.dirname(__file__), "../..")
+    mtime = os.path.getmtime(os.path.join(base_path, file_path))
+    return _cached_paths(file_path, mtime)
+
+
 def clean_paths(json_file_path):
 
     out_data = {"drones": []}